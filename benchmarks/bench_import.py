@@ -0,0 +1,63 @@
+"""测量分块导入的吞吐量随并发数的变化
+
+AI服务以固定延迟的模拟实现代替，不产生网络请求。
+
+运行方法:
+    python -m benchmarks.bench_import [行数] [模拟延迟(秒)]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from src.importer import ImportJob, parse_ai_tasks
+
+CONCURRENCY = [1, 2, 4, 8]
+
+
+class FakeAIService:
+    """每次请求固定耗时，为每行返回一个任务"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def process_input(self, user_input: str) -> str:
+        time.sleep(self.latency)
+        now = datetime.now().timetuple()[:5]
+        return str(
+            [
+                {"事项": line, "时间": now, "类型": "ONCE", "周期": None}
+                for line in user_input.splitlines()
+            ]
+        )
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    service = FakeAIService(latency)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filepath = os.path.join(tmp, "import.txt")
+        with open(filepath, "w", encoding="utf-8") as f:
+            for i in range(lines):
+                f.write(f"明天下午三点开会 第{i}项\n")
+
+        print(f"行数: {lines}，模拟延迟: {latency * 1000:.0f} ms/请求")
+        for workers in CONCURRENCY:
+            job = ImportJob(filepath)
+            imported = []
+            start = time.perf_counter()
+            job.run(
+                lambda text: parse_ai_tasks(service.process_input(text)),
+                lambda index, tasks: imported.extend(tasks),
+                max_workers=workers,
+            )
+            elapsed = time.perf_counter() - start
+            assert len(imported) == lines
+            print(f"并发数 {workers}: {elapsed:6.2f} s, {lines / elapsed:8.1f} 行/秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""对比旧的逐日步进算法与RecurrenceRule计算下一次发生时间的开销
+
+运行方法:
+    python -m benchmarks.bench_recurrence [周期任务数]
+"""
+
+import sys
+import time
+from datetime import datetime, timedelta
+from src.recurrence import WEEKDAY_MAP, compile_rule
+
+WEEKDAYS = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"]
+
+
+def make_cycles(n):
+    """生成n个周期信息，按DAILY/WEEKLY/MONTHLY轮换"""
+    cycles = []
+    for i in range(n):
+        time_str = f"{i % 24:02d}:{i % 60:02d}"
+        kind = i % 3
+        if kind == 0:
+            cycles.append(("DAILY", {"type": "daily", "time": time_str}))
+        elif kind == 1:
+            cycles.append(
+                ("WEEKLY", {"type": "weekly", "day": WEEKDAYS[i % 7], "time": time_str})
+            )
+        else:
+            # 旧算法在日期超过当月天数时会死循环，这里只取1-28号
+            cycles.append(
+                ("MONTHLY", {"type": "monthly", "day": str(i % 28 + 1), "time": time_str})
+            )
+    return cycles
+
+
+def legacy_next(task_type, cycle_info, now):
+    """旧版DataManager._calculate_next_execution的逐日步进实现"""
+    hour, minute = map(int, cycle_info.get("time", "00:00").split(":"))
+    if task_type == "DAILY":
+        next_time = now.replace(hour=hour, minute=minute)
+        if next_time <= now:
+            next_time = next_time + timedelta(days=1)
+    elif task_type == "WEEKLY":
+        target_weekday = WEEKDAY_MAP.get(cycle_info.get("day", "周一"), 0)
+        next_time = now
+        while next_time.weekday() != target_weekday:
+            next_time += timedelta(days=1)
+        next_time = next_time.replace(hour=hour, minute=minute)
+        if next_time <= now:
+            next_time += timedelta(days=7)
+    else:
+        target_day = int(cycle_info.get("day", "1"))
+        next_time = now.replace(day=1, hour=hour, minute=minute)
+        while next_time.day != target_day:
+            next_time += timedelta(days=1)
+        if next_time <= now:
+            if next_time.month == 12:
+                next_time = next_time.replace(year=next_time.year + 1, month=1)
+            else:
+                next_time = next_time.replace(month=next_time.month + 1)
+    return next_time
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    cycles = make_cycles(n)
+    now = datetime(2025, 3, 30, 12, 0)
+
+    start = time.perf_counter()
+    for task_type, cycle_info in cycles:
+        legacy_next(task_type, cycle_info, now)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rules = [compile_rule(task_type, cycle_info) for task_type, cycle_info in cycles]
+    compile_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for rule in rules:
+        rule.next_after(now)
+    rule_time = time.perf_counter() - start
+
+    print(f"周期任务数: {n}")
+    print(f"旧算法（每次解析+逐日步进）: {legacy_time * 1000:8.2f} ms")
+    print(f"编译规则（一次性）:          {compile_time * 1000:8.2f} ms")
+    print(f"RecurrenceRule.next_after:   {rule_time * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
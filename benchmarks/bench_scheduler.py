@@ -0,0 +1,87 @@
+"""对比HeapScheduler与TimingWheelScheduler在大量提醒下的调度耗时
+
+模拟一个月的运行：先为全部任务安排提醒，随后每分钟取出到期的提醒，
+期间不断有任务被修改（重新调度）或删除（取消）。
+
+运行方法:
+    python -m benchmarks.bench_scheduler [任务数]
+"""
+
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from src.scheduler import HeapScheduler, TimingWheelScheduler
+
+OFFSETS = [60, 30, 5, 0]
+DAYS = 30
+CHANGES_PER_MINUTE = 20  # 每分钟修改/删除的任务数
+
+
+def make_workload(n):
+    """生成初始的 (task_id, 发生时间) 和每分钟的修改操作"""
+    rng = random.Random(0)
+    start = datetime(2026, 1, 1)
+    horizon = DAYS * 24 * 60 * 60
+    initial = [
+        (task_id, start + timedelta(seconds=rng.randrange(horizon))) for task_id in range(n)
+    ]
+    changes = []
+    for minute in range(DAYS * 24 * 60):
+        now = start + timedelta(minutes=minute)
+        ops = []
+        for _ in range(CHANGES_PER_MINUTE):
+            task_id = rng.randrange(n)
+            if rng.random() < 0.2:
+                ops.append((task_id, None))
+            else:
+                ops.append((task_id, now + timedelta(seconds=rng.randrange(horizon))))
+        changes.append((now, ops))
+    return start, initial, changes
+
+
+def run(scheduler, initial, changes):
+    """返回 (初始安排耗时, 修改耗时, 到期处理耗时, 触发的提醒数)"""
+    begin = time.perf_counter()
+    for task_id, occurs_at in initial:
+        scheduler.schedule(task_id, occurs_at, OFFSETS)
+    schedule_time = time.perf_counter() - begin
+
+    fired = 0
+    change_time = tick_time = 0.0
+    for now, ops in changes:
+        begin = time.perf_counter()
+        for task_id, occurs_at in ops:
+            if occurs_at is None:
+                scheduler.cancel(task_id)
+            else:
+                scheduler.schedule(task_id, occurs_at, OFFSETS)
+        middle = time.perf_counter()
+        fired += len(scheduler.pop_due(now))
+        scheduler.next_fire_time()
+        change_time += middle - begin
+        tick_time += time.perf_counter() - middle
+    return schedule_time, change_time, tick_time, fired
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    start, initial, changes = make_workload(n)
+    print(f"任务数: {n}，提醒数: {n * len(OFFSETS)}，模拟 {DAYS} 天（每分钟一次检查）")
+    print(f"{'调度方式':<10}{'安排(ms)':>12}{'修改(ms)':>12}{'到期(ms)':>12}{'触发数':>10}")
+    results = []
+    for name, scheduler in (
+        ("heap", HeapScheduler()),
+        ("wheel", TimingWheelScheduler(start)),
+    ):
+        schedule_time, change_time, tick_time, fired = run(scheduler, initial, changes)
+        results.append(fired)
+        print(
+            f"{name:<10}{schedule_time * 1000:>12.1f}{change_time * 1000:>12.1f}"
+            f"{tick_time * 1000:>12.1f}{fired:>10}"
+        )
+    assert results[0] == results[1]
+
+
+if __name__ == "__main__":
+    main()
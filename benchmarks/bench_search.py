@@ -0,0 +1,117 @@
+"""对比逐条子串扫描、SearchIndex倒排索引与DataManager.search（含排序取前50个）的耗时
+
+DataManager使用临时目录中的数据文件，任务时间分布在前3天到后30天之间，
+四分之一为每天的周期任务。
+
+运行方法:
+    python -m benchmarks.bench_search [任务数]
+"""
+
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from src.config import AppConfig
+from src.data_manager import DataManager
+from src.search_index import SearchIndex
+
+WORDS = [
+    "明天", "下午", "开会", "买菜", "交报告", "给妈妈", "打电话", "去医院", "复查",
+    "健身", "跑步", "读书", "写作业", "还信用卡", "接孩子", "取快递", "项目", "评审",
+]
+QUERIES = ["开会", "医院复查", "妈妈 电话", "交报", "项目 评审 下午", "不存在的内容"]
+REPEAT = 100
+
+
+def make_contents(n):
+    """生成n条由常用词随机拼成的任务内容"""
+    rng = random.Random(0)
+    return [
+        "".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))) for _ in range(n)
+    ]
+
+
+def make_data_manager(contents, app_dir: Path) -> DataManager:
+    """在app_dir中建立包含contents的DataManager"""
+    AppConfig.APP_DIR = app_dir
+    AppConfig.DATA_FILE = app_dir / "data.xlsx"
+    AppConfig.DB_FILE = app_dir / "data.db"
+    AppConfig.SNAPSHOT_FILE = app_dir / "data.snap"
+    AppConfig.ARCHIVE_FILE = app_dir / "archive.db"
+    AppConfig.WRITE_BEHIND = False
+
+    rng = random.Random(1)
+    now = datetime.now()
+    tasks = []
+    for i, content in enumerate(contents):
+        dt = now + timedelta(minutes=rng.randrange(-3 * 24 * 60, 30 * 24 * 60))
+        recurring = i % 4 == 0
+        tasks.append(
+            {
+                "content": content,
+                "dt": dt,
+                "task_type": "DAILY" if recurring else "ONCE",
+                "cycle_info": {"time": dt.strftime("%H:%M")} if recurring else None,
+            }
+        )
+    data_manager = DataManager()
+    data_manager.add_tasks(tasks)
+    return data_manager
+
+
+def scan(contents, query):
+    """不建索引，逐条检查是否包含全部关键词"""
+    terms = query.split()
+    return {
+        task_id
+        for task_id, content in enumerate(contents)
+        if all(term in content for term in terms)
+    }
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    contents = make_contents(n)
+
+    start = time.perf_counter()
+    index = SearchIndex()
+    index.rebuild(enumerate(contents))
+    build_time = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_manager = make_data_manager(contents, Path(tmp))
+        data_manager.search(QUERIES[0])  # 第一次搜索时建立索引
+
+        print(f"任务数: {n}，建立索引: {build_time * 1000:.1f} ms")
+        print(
+            f"{'查询':<14}{'结果数':>8}{'扫描(ms)':>12}{'索引(ms)':>12}{'search(ms)':>12}"
+        )
+        for query in QUERIES:
+            start = time.perf_counter()
+            for _ in range(REPEAT):
+                expected = scan(contents, query)
+            scan_time = (time.perf_counter() - start) / REPEAT
+
+            start = time.perf_counter()
+            for _ in range(REPEAT):
+                result = index.search(query)
+            index_time = (time.perf_counter() - start) / REPEAT
+
+            start = time.perf_counter()
+            for _ in range(REPEAT):
+                found = data_manager.search(query)
+            search_time = (time.perf_counter() - start) / REPEAT
+
+            assert result == expected, query
+            assert len(found) == min(len(result), 50), query
+            print(
+                f"{query:<14}{len(result):>8}{scan_time * 1000:>12.3f}"
+                f"{index_time * 1000:>12.3f}{search_time * 1000:>12.3f}"
+            )
+        data_manager.close()
+
+
+if __name__ == "__main__":
+    main()
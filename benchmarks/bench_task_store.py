@@ -0,0 +1,120 @@
+"""对比pandas DataFrame与TaskStore的内存占用和遍历开销
+
+运行方法:
+    python -m benchmarks.bench_task_store [任务数]
+"""
+
+import sys
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+import pandas as pd
+from src.task_store import Task, TaskStore
+
+
+def make_rows(n):
+    """生成n条测试任务，其中四分之一为周期任务"""
+    start = datetime(2025, 1, 1, 8, 0)
+    rows = []
+    for i in range(n):
+        recurring = i % 4 == 0
+        rows.append(
+            {
+                "id": i + 1,
+                "content": f"测试任务{i}",
+                "datetime": start + timedelta(minutes=i),
+                "type": "DAILY" if recurring else "ONCE",
+                "cycle_info": (
+                    json.dumps({"type": "daily", "time": "08:00"}) if recurring else None
+                ),
+                "reminded": i % 3 == 0,
+            }
+        )
+    return rows
+
+
+def build_df(rows):
+    df = pd.DataFrame(rows).set_index("id")
+    df["datetime"] = pd.to_datetime(df["datetime"])
+    return df
+
+
+def build_store(rows):
+    return TaskStore(Task.from_row(row) for row in rows)
+
+
+def measure_memory(build, n):
+    # 在跟踪期间生成数据，只统计构建完成后仍被持有的内存
+    tracemalloc.start()
+    obj = build(make_rows(n))
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, current
+
+
+def scan_df(df, now):
+    """旧的提醒检查方式：iterrows并重新解析cycle_info"""
+    count = 0
+    for _, task in df.iterrows():
+        if not task["reminded"] and task["datetime"] > now:
+            count += 1
+        if isinstance(task["cycle_info"], str):
+            json.loads(task["cycle_info"])
+    return count
+
+
+def scan_store(store, now):
+    count = 0
+    for task in store:
+        if not task.reminded and task.datetime > now:
+            count += 1
+        if task.cycle:
+            task.cycle.get("time")
+    return count
+
+
+def scan_select(store, now):
+    """按列批量读取字段"""
+    count = 0
+    for reminded, dt, cycle in store.select("reminded", "datetime", "cycle"):
+        if not reminded and dt > now:
+            count += 1
+        if cycle:
+            cycle.get("time")
+    return count
+
+
+def timeit(func, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    now = datetime(2025, 2, 1)
+
+    df, df_mem = measure_memory(build_df, n)
+    store, store_mem = measure_memory(build_store, n)
+    df_time = timeit(scan_df, df, now, repeat=1)
+    store_time = timeit(scan_store, store, now)
+    select_time = timeit(scan_select, store, now)
+
+    print(f"任务数: {n}")
+    print(f"{'':12}{'内存/任务(B)':>14}{'遍历耗时(ms)':>14}{'每任务(us)':>12}")
+    for name, mem, elapsed in (
+        ("DataFrame", df_mem, df_time),
+        ("TaskStore", store_mem, store_time),
+        ("  select", store_mem, select_time),
+    ):
+        print(
+            f"{name:12}{mem / n:>14.1f}{elapsed * 1000:>14.1f}{elapsed / n * 1e6:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ from PyQt5.QtWidgets import QApplication, QMessageBox, QSystemTrayIcon
 from PyQt5.QtGui import QIcon
 from ui.main_window import MainWindow
 from src.config import AppConfig
+from src.instance_lock import InstanceLock
 from utils.audio_utils import check_audio_system
 
 
@@ -92,6 +93,15 @@ def main():
         app.setApplicationName(AppConfig.APP_NAME)
         logger.info("Qt应用程序创建成功")
 
+        # 与提醒服务共用锁文件，避免两个进程同时读写任务数据
+        lock = InstanceLock()
+        if not lock.acquire():
+            logger.error("已有Smart Memo或提醒服务在运行")
+            QMessageBox.critical(
+                None, "错误", "Smart Memo或提醒服务已在运行，请勿重复启动。"
+            )
+            return 1
+
         # 检查系统托盘
         if not check_system_tray():
             logger.warning("系统托盘不可用，提醒功能可能受限")
@@ -109,7 +119,10 @@ def main():
         tray_icon.show()
         logger.info("系统托盘图标创建成功")
 
-        return app.exec_()
+        try:
+            return app.exec_()
+        finally:
+            lock.release()
 
     except Exception as e:
         error_msg = f"程序启动错误: {str(e)}"
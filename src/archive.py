@@ -0,0 +1,137 @@
+import sqlite3
+import logging
+from datetime import datetime
+from .storage import TASK_COLUMNS, _from_db_datetime, _to_db_datetime
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+
+def _from_db_row(row) -> dict:
+    task_id, content, dt, task_type, cycle_info, reminded, last_done, offsets = row
+    return {
+        "id": task_id,
+        "content": content,
+        "datetime": _from_db_datetime(dt),
+        "type": task_type,
+        "cycle_info": cycle_info,
+        "reminded": bool(reminded),
+        "last_done": _from_db_datetime(last_done),
+        "reminder_offsets": offsets,
+    }
+
+
+class TaskArchive:
+    """已完成任务的冷存储
+
+    过期的一次性任务从工作集移到独立的SQLite文件中，只追加不修改，
+    不参与启动载入和提醒检查，只在查询历史和导出时读取。
+    """
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self.conn = sqlite3.connect(str(db_file), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS archive (
+                    id INTEGER PRIMARY KEY,
+                    content TEXT NOT NULL,
+                    datetime TEXT,
+                    type TEXT NOT NULL DEFAULT 'ONCE',
+                    cycle_info TEXT,
+                    reminded INTEGER NOT NULL DEFAULT 0,
+                    last_done TEXT,
+                    reminder_offsets TEXT,
+                    archived_at TEXT NOT NULL
+                )
+                """
+            )
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(archive)")}
+            if "reminder_offsets" not in columns:
+                self.conn.execute("ALTER TABLE archive ADD COLUMN reminder_offsets TEXT")
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_archive_datetime ON archive(datetime)"
+            )
+        logger.debug(f"归档存储已打开: {db_file}")
+
+    def append(self, tasks: list):
+        """追加一批任务（含id），已归档的id会被忽略，重复归档不会产生重复记录"""
+        archived_at = _to_db_datetime(datetime.now())
+        rows = [
+            (
+                task["id"],
+                task["content"],
+                _to_db_datetime(task["datetime"]),
+                task["type"],
+                task["cycle_info"],
+                int(bool(task["reminded"])),
+                _to_db_datetime(task.get("last_done")),
+                task.get("reminder_offsets"),
+                archived_at,
+            )
+            for task in tasks
+        ]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO archive"
+                f" (id, {', '.join(TASK_COLUMNS)}, archived_at)"
+                f" VALUES ({', '.join('?' * (len(TASK_COLUMNS) + 2))})",
+                rows,
+            )
+
+    def query(
+        self,
+        start: datetime = None,
+        end: datetime = None,
+        keyword: str = None,
+        limit: int = None,
+    ) -> list:
+        """按时间范围 [start, end) 和关键字查询归档任务，按时间排序
+
+        keyword中以空白分隔的多个词须全部出现在任务内容中，英文字母不区分大小写。
+
+        Returns:
+            与StorageBackend.load格式相同的任务字典列表
+        """
+        conditions, params = [], []
+        if start is not None:
+            conditions.append("datetime >= ?")
+            params.append(_to_db_datetime(start))
+        if end is not None:
+            conditions.append("datetime < ?")
+            params.append(_to_db_datetime(end))
+        for term in (keyword or "").lower().split():
+            conditions.append("instr(lower(content), ?) > 0")
+            params.append(term)
+        sql = f"SELECT id, {', '.join(TASK_COLUMNS)} FROM archive"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY datetime, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        return [_from_db_row(row) for row in self.conn.execute(sql, params)]
+
+    def iter_rows(self, batch_size: int = 1000):
+        """按时间顺序逐批读取全部归档任务，内存中最多保留batch_size条"""
+        cursor = self.conn.execute(
+            f"SELECT id, {', '.join(TASK_COLUMNS)} FROM archive ORDER BY datetime, id"
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for row in rows:
+                yield _from_db_row(row)
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM archive").fetchone()[0]
+
+    def close(self):
+        try:
+            self.conn.close()
+        except Exception as e:
+            logger.error(f"关闭归档存储失败: {e}", exc_info=True)
@@ -1,8 +1,12 @@
 from pathlib import Path
 import os
-import pyaudio
 import logging
 
+try:
+    import pyaudio
+except ImportError:  # 无界面的提醒服务不录音，可以不安装PyAudio
+    pyaudio = None
+
 
 class AppConfig:
     # 应用基础配置
@@ -11,15 +15,34 @@ class AppConfig:
     BASE_DIR = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
     # 文件配置
-    DATA_FILE = APP_DIR / "data.xlsx"
+    DATA_FILE = APP_DIR / "data.xlsx"  # 旧版数据文件，现仅用于迁移
+    DB_FILE = APP_DIR / "data.db"
+    SNAPSHOT_FILE = APP_DIR / "data.snap"  # 启动快照
+    ARCHIVE_FILE = APP_DIR / "archive.db"  # 已完成任务的归档
+    LOCK_FILE = APP_DIR / "smartmemo.lock"  # 同一时间只允许一个进程（界面或提醒服务）读写数据
     AUDIO_FILE = APP_DIR / "audio.wav"
     ICON_FILE = BASE_DIR / "assets" / "cover.png"
 
+    # 存储配置
+    STORAGE_BACKEND = "sqlite"  # 存储后端: sqlite / excel
+    WRITE_BEHIND = True  # 是否由后台线程合并写入
+    WRITE_BEHIND_DELAY = 1.0  # 后台写入的合并窗口（秒）
+    USE_SNAPSHOT = True  # 是否使用二进制快照加速启动
+    ARCHIVE_AFTER_DAYS = 7  # 一次性任务过期多少天后移入归档
+
+    # 导入配置
+    IMPORT_CHUNK_LINES = 20  # 每次交给AI解析的行数
+    IMPORT_MAX_WORKERS = 4  # 同时进行的AI请求数
+    IMPORT_RETRIES = 2  # 每块解析失败后的重试次数
+    IMPORT_STATE_DIR = APP_DIR / "imports"  # 未完成导入的进度记录
+    IMPORT_CANCEL_POLL = 0.2  # 等待AI请求时检查取消的间隔（秒）
+    WORKER_QUIT_TIMEOUT = 3000  # 退出时等待导入导出线程结束的最长时间（毫秒）
+
     # 音频配置
     AUDIO_CHANNELS = 1  # 录音通道数
     AUDIO_RATE = 44100  # 录音采样率
     AUDIO_CHUNK = 1024  # 缓冲区大小
-    AUDIO_FORMAT = pyaudio.paInt16  # 采样格式
+    AUDIO_FORMAT = pyaudio.paInt16 if pyaudio else 8  # 采样格式（8即paInt16）
 
     # 科大讯飞配置
     XF_APPID = os.getenv('XF_APPID')
@@ -36,7 +59,16 @@ class AppConfig:
     XF_RESPONSE_TIMEOUT = 5  # 首次响应超时时间
 
     # 提醒配置
-    REMINDER_CHECK_INTERVAL = 60000  # 检查间隔（毫秒）
+    # 提醒定时器单次最长等待时间（毫秒）。定时器按单调时间计时，休眠期间不走，
+    # 唤醒后最迟经过这段时间就会检测到休眠并补发错过的提醒
+    REMINDER_MAX_SLEEP = 60000
+    REMINDER_COALESCE_SECONDS = 0.5  # 提醒到期后推迟该秒数触发，期间到期的提醒合并播报（应小于1秒）
+    REMINDER_COALESCE_MAX = 5  # 合并播报时最多列出的提醒数
+    REMINDER_LEDGER_FILE = APP_DIR / "reminder_ledger.bin"  # 已送达提醒的记录
+    REMINDER_LEDGER_DAYS = 7  # 已送达提醒的记录保留天数
+    REMINDER_CATCHUP_DAYS = 7  # 启动或系统唤醒后补发多少天内错过的提醒
+    REMINDER_CLOCK_JUMP_SECONDS = 60  # 时钟偏差超过该秒数视为系统休眠或时钟调整
+    REMINDER_SCHEDULER = "heap"  # 提醒调度方式: heap / wheel（提醒数很多时使用）
     REMINDER_DURATION = 5000  # 提醒显示时长（毫秒）
     REMINDER_TIMES = [30, 5]  # 提醒时间点（分钟
     NOTIFICATION_SOUND = BASE_DIR / "assets" / "notification.wav"  # 提醒音效文件路径
@@ -51,6 +83,12 @@ class AppConfig:
     TTS_SAMPLE_RATE = 16000  # 采样率
     TTS_CHANNELS = 1  # 声道数
     TTS_SAMPLE_WIDTH = 2  # 采样位深（字节）= 16位/8
+    TTS_CACHE_DIR = APP_DIR / "tts_cache"  # 合成语音缓存目录
+    TTS_CACHE_MAX_BYTES = 50 * 1024 * 1024  # 语音缓存磁盘占用上限
+    TTS_CACHE_MEMORY_ITEMS = 32  # 内存中保留的最近使用语音条数
+    TTS_QUEUE_SIZE = 16  # 播报队列长度，队列满时丢弃最早的消息
+    TTS_PRESYNTH_MINUTES = 60  # 提前多少分钟预合成提醒语音，0表示不预合成
+    TTS_STOP_TIMEOUT = 2.0  # 退出时等待语音线程结束的最长时间（秒）
 
     # 任务类型配置
     TASK_TYPES = {
@@ -0,0 +1,110 @@
+"""无界面的提醒服务
+
+只载入任务数据、提醒调度和语音播报，不创建Qt应用、主窗口、录音和AI服务，
+适合在没有图形界面、长期运行的机器上使用:
+
+    python -m src.daemon
+
+提醒通知写入日志并语音播报。按Ctrl+C或发送SIGTERM退出。
+"""
+
+import os
+import signal
+import sys
+import threading
+import time
+import logging
+from .config import AppConfig
+from .data_manager import DataManager
+from .instance_lock import InstanceLock
+from .reminder_core import ReminderCore
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+
+class ReminderDaemon(ReminderCore):
+    """在主线程中等待下一个触发时间的提醒服务"""
+
+    def __init__(self, data_manager):
+        self._wake = threading.Event()
+        self._deadline = None  # 定时器到期的单调时间，None表示未设置
+        self._stopping = False
+        super().__init__(data_manager)
+
+    def _start_timer(self, delay: int):
+        self._deadline = time.monotonic() + delay / 1000
+        self._wake.set()
+
+    def _stop_timer(self):
+        self._deadline = None
+        self._wake.set()
+
+    def _notify(self, title: str, message: str):
+        logger.info(f"{title}: {message}")
+
+    def run(self):
+        """运行直到request_stop被调用"""
+        self._start()
+        while not self._stopping:
+            if self._deadline is None:
+                timeout = None
+            else:
+                timeout = max(self._deadline - time.monotonic(), 0)
+            # 定时器被重新设置时提前醒来，按新的到期时间等待
+            if self._wake.wait(timeout):
+                self._wake.clear()
+                continue
+            self._deadline = None
+            self.check_reminders()
+
+    def request_stop(self):
+        """通知run退出，可在信号处理函数中调用"""
+        self._stopping = True
+        self._wake.set()
+
+
+def setup_logging():
+    """日志同时输出到控制台和应用日志文件"""
+    os.makedirs(AppConfig.APP_DIR, exist_ok=True)
+    logging.basicConfig(
+        level=AppConfig.LOG_LEVEL,
+        format=AppConfig.LOG_FORMAT,
+        handlers=[
+            logging.FileHandler(str(AppConfig.APP_DIR / "app.log")),
+            logging.StreamHandler(),
+        ],
+    )
+
+
+def main():
+    setup_logging()
+    lock = InstanceLock()
+    if not lock.acquire():
+        logger.error("已有Smart Memo或提醒服务在运行，退出")
+        return 1
+    data_manager = None
+    daemon = None
+    try:
+        data_manager = DataManager()
+        daemon = ReminderDaemon(data_manager)
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: daemon.request_stop())
+        logger.info(f"提醒服务已启动: {len(data_manager.tasks)} 个任务")
+        daemon.run()
+        return 0
+    except Exception as e:
+        logger.error(f"提醒服务出错: {e}", exc_info=True)
+        return 1
+    finally:
+        # 先保存数据，再停止可能阻塞的语音线程
+        if data_manager is not None:
+            data_manager.close()
+        if daemon is not None:
+            daemon.stop()
+        lock.release()
+        logger.info("提醒服务已退出")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
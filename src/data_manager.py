@@ -1,279 +1,643 @@
-import pandas as pd
-from datetime import datetime, timedelta
+import heapq
+import itertools
+import numpy as np
+from datetime import date, datetime, timedelta
 from .config import AppConfig
+from .archive import TaskArchive
+from .exporter import ExportCancelled, export_excel, export_txt
+from .storage import ExcelStorage, create_storage
+from .recurrence import OCCURRENCE_DTYPE, RuleTable
+from .search_index import SearchIndex
+from .snapshot import read_snapshot, write_snapshot
+from .task_index import DayIndex, DueIndex
+from .task_store import Task, TaskStore, next_occurrence, parse_reminder_offsets
 import os
-import json
 import logging
 
 # 设置日志
 logger = logging.getLogger(__name__)
 
 
+def _to_datetime(dt) -> datetime:
+    """将字符串或pandas时间戳统一转换为datetime"""
+    if isinstance(dt, str):
+        return datetime.fromisoformat(dt)
+    if not isinstance(dt, datetime):
+        raise ValueError(f"任务时间无效: {dt!r}")
+    # pandas的Timestamp是datetime的子类，不必为判断类型而载入pandas
+    to_pydatetime = getattr(dt, "to_pydatetime", None)
+    return to_pydatetime() if to_pydatetime is not None else dt
+
+
+def _task_time(task: Task) -> datetime:
+    return task.datetime
+
+
 class DataManager:
     def __init__(self):
         self.excel_file = AppConfig.DATA_FILE
         os.makedirs(AppConfig.APP_DIR, exist_ok=True)
-        self._init_excel()
-
-    def _init_excel(self):
+        self._init_storage()
+
+    def _init_storage(self):
+        """初始化存储后端并载入全部任务"""
+        self._listeners = []
+        self.storage = create_storage()
+        self.archive = TaskArchive(AppConfig.ARCHIVE_FILE)
+        if AppConfig.STORAGE_BACKEND != "excel":
+            self._migrate_from_excel()
+        self.tasks = self._load_tasks()
+        self._search_index = None  # 第一次搜索时建立
+        self._day_index = None  # 第一次按日期查询时建立
+        self._collapse_recurring_chains()
+        self._rebuild_due_index()
+        self.archive_completed()
+
+    def _load_tasks(self) -> TaskStore:
+        """载入全部任务，快照有效时直接读取快照"""
+        if not AppConfig.USE_SNAPSHOT:
+            return TaskStore(Task.from_row(row) for row in self.storage.load())
+
+        stamp = self.storage.stamp()
+        tasks = read_snapshot(AppConfig.SNAPSHOT_FILE, stamp)
+        if tasks is not None:
+            logger.debug(f"从快照载入 {len(tasks)} 个任务")
+            return tasks
+
+        tasks = TaskStore(Task.from_row(row) for row in self.storage.load())
+        self._write_snapshot(tasks, stamp)
+        return tasks
+
+    def _write_snapshot(self, tasks, stamp):
         try:
-            self.df = pd.read_excel(self.excel_file, parse_dates=["datetime"])
-            # 确保所有必要的列都存在
-            required_columns = ["content", "datetime", "type", "cycle_info", "reminded"]
-            for col in required_columns:
-                if col not in self.df.columns:
-                    self.df[col] = None
-        except FileNotFoundError:
-            self.df = pd.DataFrame(
-                {
-                    "content": [],
-                    "datetime": [],
-                    "type": [],
-                    "cycle_info": [],
-                    "reminded": [],
-                }
+            write_snapshot(AppConfig.SNAPSHOT_FILE, tasks, stamp)
+        except Exception as e:
+            logger.error(f"写入快照失败: {e}", exc_info=True)
+
+    def _migrate_from_excel(self):
+        """一次性将旧版data.xlsx中的任务迁移到当前存储后端"""
+        if self.storage.get_meta("excel_migrated"):
+            return
+        if os.path.exists(self.excel_file):
+            logger.info(f"从旧版Excel文件迁移数据: {self.excel_file}")
+            legacy_tasks = ExcelStorage(self.excel_file).load()
+            for task in legacy_tasks:
+                task.pop("id", None)
+            self.storage.insert_many(legacy_tasks)
+            logger.info(f"迁移完成，共 {len(legacy_tasks)} 个任务")
+        self.storage.set_meta("excel_migrated", datetime.now().isoformat())
+
+    def _collapse_recurring_chains(self):
+        """一次性合并旧版本为周期任务每次触发追加的记录
+
+        旧版本每次提醒周期任务后都会新增一条记录。内容、类型和周期信息相同的
+        记录合并为最早的一条，已提醒记录中最晚的时间作为last_done。
+        """
+        if self.storage.get_meta("recurring_collapsed"):
+            return
+        chains = {}
+        for task in self.tasks:
+            if task.is_recurring:
+                chains.setdefault(
+                    (task.content, task.type_code, task.cycle_info), []
+                ).append(task)
+
+        collapsed = 0
+        for chain in chains.values():
+            reminded = [task.datetime for task in chain if task.reminded]
+            if len(chain) == 1 and not reminded:
+                continue
+            chain.sort(key=_task_time)
+            anchor = chain[0]
+            anchor.reminded = False
+            if reminded:
+                anchor.last_done = max(reminded)
+            self.storage.update(anchor.id, anchor.to_row())
+            for task in chain[1:]:
+                self.tasks.remove(task.id)
+                self.storage.delete(task.id)
+            collapsed += len(chain) - 1
+
+        if collapsed:
+            logger.info(f"合并周期任务的历史记录: {collapsed} 条")
+        self.storage.set_meta("recurring_collapsed", datetime.now().isoformat())
+
+    def _rebuild_due_index(self):
+        """根据当前全部任务重建触发时间索引"""
+        self._occurrence_table = None
+        # 此时间之前的周期任务发生已检查过是否错过
+        self._due_checked_at = datetime.min
+        self.due_index = DueIndex()
+        self.due_index.rebuild(
+            (task_id, next_occurrence(dt, reminded, rule, last_done))
+            for task_id, dt, reminded, rule, last_done in self.tasks.select(
+                "id", "datetime", "reminded", "rule", "last_done"
             )
-            self.df["datetime"] = pd.to_datetime(self.df["datetime"])
-            self.save()
+        )
+
+    def add_listener(self, callback):
+        """注册任务变更的回调
+
+        任务的触发时间可能改变时调用callback(task_id)；全部任务被清除时
+        调用callback(None)。回调在修改数据的线程中同步执行。
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, task_id):
+        for callback in self._listeners:
+            try:
+                callback(task_id)
+            except Exception as e:
+                logger.error(f"任务变更回调出错: {e}", exc_info=True)
+
+    def _index_task(self, task: Task):
+        """更新单个任务在触发时间索引和全文索引中的位置
+
+        运行中新增或修改的周期任务，其起始时间或last_done之后的发生可能已经过去，
+        这些发生不再提醒，索引中记为now之后的下一次发生。
+        """
+        self._occurrence_table = None
+        occurs_at = task.next_occurrence()
+        if task.rule is not None:
+            now = datetime.now()
+            if occurs_at <= now:
+                occurs_at = task.rule.next_after(now)
+        self.due_index.set(task.id, occurs_at)
+        self._notify(task.id)
+        if self._search_index is not None:
+            self._search_index.add(task.id, task.content)
+        if self._day_index is not None:
+            self._day_index.set(task.id, task.datetime, task.rule)
+
+    def _unindex_task(self, task_id):
+        """将任务移出各个索引"""
+        self._occurrence_table = None
+        self.due_index.remove(task_id)
+        if self._search_index is not None:
+            self._search_index.remove(task_id)
+        if self._day_index is not None:
+            self._day_index.remove(task_id)
+        self._notify(task_id)
+
+    def _skip_missed_occurrences(self, now: datetime):
+        """将已错过的周期任务发生移到now之后的下一次发生
+
+        只检查上次调用以来经过的时间段，错过的发生不会记为已完成。
+        """
+        for task_id in self.due_index.range(self._due_checked_at, now):
+            task = self.tasks[task_id]
+            if task.rule is not None:
+                self.due_index.set(task_id, task.rule.next_after(now))
+                self._notify(task_id)
+        self._due_checked_at = now
+
+    def missed_occurrences(self, now: datetime = None) -> list:
+        """上次检查以来已错过、尚未完成的发生
+
+        在触发时间索引中用一次范围查询找出触发时间已过的任务，周期任务再按规则
+        展开到now，得到最后一次错过的发生。只补发最近REMINDER_CATCHUP_DAYS天内的
+        发生，离线再久也只需展开有限的发生。
+
+        Returns:
+            按发生时间排序的 (task_id, occurs_at, count) 列表，occurs_at是最后一次
+            错过的发生，count是补发范围内错过的次数
+        """
+        now = now or datetime.now()
+        since = now - timedelta(days=AppConfig.REMINDER_CATCHUP_DAYS)
+        missed = []
+        for task_id in self.due_index.range(self._due_checked_at, now):
+            rule = self.tasks[task_id].rule
+            occurs_at = self.due_index.get(task_id)
+            if rule is None:
+                if occurs_at > since:
+                    missed.append((task_id, occurs_at, 1))
+                continue
+            if occurs_at <= since:
+                occurs_at = rule.next_after(since)
+            last, count = None, 0
+            while occurs_at <= now:
+                last, count = occurs_at, count + 1
+                occurs_at = rule.next_after(occurs_at)
+            if count:
+                missed.append((task_id, last, count))
+        missed.sort(key=lambda item: item[1])
+        return missed
+
+    def pending_occurrences(self):
+        """全部任务尚未到来的下一次发生
+
+        Returns:
+            按发生时间排序的 (task_id, occurs_at) 列表
+        """
+        now = datetime.now()
+        self._skip_missed_occurrences(now)
+        return [
+            (task_id, self.due_index.get(task_id))
+            for task_id in self.due_index.range(now, datetime.max)
+        ]
+
+    def next_occurrence(self, task_id) -> datetime:
+        """任务在触发时间索引中的下一次发生，已完成或不存在时返回None"""
+        return self.due_index.get(task_id)
+
+    def archive_completed(self) -> int:
+        """将过期超过ARCHIVE_AFTER_DAYS天的一次性任务移入归档
+
+        先追加到归档再从工作集删除，中途退出时下次会重新归档，不会丢失任务。
+
+        Returns:
+            归档的任务数
+        """
+        cutoff = datetime.now() - timedelta(days=AppConfig.ARCHIVE_AFTER_DAYS)
+        expired = self.tasks.views(
+            task_id
+            for task_id, dt, rule in self.tasks.select("id", "datetime", "rule")
+            if rule is None and dt is not None and dt < cutoff
+        )
+        if not expired:
+            return 0
+        try:
+            self.archive.append([{**task.to_row(), "id": task.id} for task in expired])
+            for task in expired:
+                self.tasks.remove(task.id)
+                self._unindex_task(task.id)
+                self.storage.delete(task.id)
+            logger.info(f"归档已完成的任务: {len(expired)} 个")
+            return len(expired)
+        except Exception as e:
+            logger.error(f"归档任务失败: {e}", exc_info=True)
+            raise
+
+    def get_archived_tasks(
+        self, start: datetime = None, end: datetime = None, keyword: str = None
+    ):
+        """查询归档中的历史任务，可按时间范围 [start, end) 和内容关键字筛选
+
+        keyword中以空白分隔的多个词须全部出现在任务内容中。
+        """
+        return [Task.from_row(row) for row in self.archive.query(start, end, keyword)]
+
+    def _export_tasks(self, include_archived: bool):
+        """导出用的任务序列及其总数，需要时在工作集之前加上归档中的历史任务
+
+        工作集在调用时复制下来，归档任务逐批从磁盘读取，导出可以在后台线程中进行。
+        """
+        tasks = self.tasks.copies()
+        if not include_archived:
+            return tasks, len(tasks)
+        archived = (Task.from_row(row) for row in self.archive.iter_rows())
+        return itertools.chain(archived, tasks), len(self.archive) + len(tasks)
 
     def save(self):
-        """保存数据到Excel文件"""
+        """将缓冲中的修改写入存储后端"""
         try:
-            self.df.to_excel(self.excel_file, index=False)
-            # 重新读取以确保数据类型正确
-            self.df = pd.read_excel(self.excel_file, parse_dates=["datetime"])
+            self.storage.flush()
             logger.debug("数据保存成功")
         except Exception as e:
             logger.error(f"保存数据失败: {e}", exc_info=True)
             raise
 
+    def close(self):
+        """保存并关闭存储后端，同时更新启动快照"""
+        self.save()
+        if AppConfig.USE_SNAPSHOT:
+            self._write_snapshot(self.tasks, self.storage.stamp())
+        self.storage.close()
+        self.archive.close()
+
+    def _make_task(
+        self,
+        content: str,
+        dt: datetime,
+        task_type: str = "ONCE",
+        cycle_info: dict = None,
+        reminder_offsets=None,
+    ) -> Task:
+        """校验任务字段并构造尚未分配id的Task"""
+        if content is None:
+            raise ValueError(f"任务内容无效: {content!r}")
+        self._check_fields(content, task_type, cycle_info, reminder_offsets)
+        return Task(
+            None,
+            content,
+            _to_datetime(dt),
+            task_type,
+            cycle_info or None,
+            reminder_offsets=reminder_offsets,
+        )
+
+    @staticmethod
+    def _check_fields(content, task_type, cycle_info, reminder_offsets):
+        """校验任务字段，为None的字段表示不修改，不做检查"""
+        if content is not None and (not isinstance(content, str) or not content.strip()):
+            raise ValueError(f"任务内容无效: {content!r}")
+        if task_type is not None and task_type not in AppConfig.TASK_TYPES:
+            raise ValueError(f"未知的任务类型: {task_type}")
+        if cycle_info is not None and not isinstance(cycle_info, dict):
+            raise ValueError(f"周期信息格式错误: {cycle_info}")
+        if reminder_offsets is not None and not isinstance(reminder_offsets, (list, tuple)):
+            raise ValueError(f"提醒时间点格式错误: {reminder_offsets}")
+
     def add_task(
         self,
         content: str,
         dt: datetime,
         task_type: str = "ONCE",
         cycle_info: dict = None,
+        reminder_offsets=None,
     ):
-        """添加新任务"""
+        """添加新任务
+
+        Args:
+            reminder_offsets: 提醒时间点（提前的分钟数）列表，None表示使用默认的
+                AppConfig.REMINDER_TIMES
+        """
+        logger.debug(f"添加任务: {content}, 时间: {dt}, 类型: {task_type}")
+        return self.add_tasks(
+            [
+                {
+                    "content": content,
+                    "dt": dt,
+                    "task_type": task_type,
+                    "cycle_info": cycle_info,
+                    "reminder_offsets": reminder_offsets,
+                }
+            ]
+        )[0]
+
+    def add_tasks(self, tasks):
+        """批量添加任务
+
+        tasks中的每一项是与add_task参数同名的字典（content, dt, task_type,
+        cycle_info, reminder_offsets）。所有任务先全部校验，再一次性写入存储后端，
+        任一任务无效时不会写入任何任务。
+
+        Returns:
+            新任务的id列表
+        """
         try:
-            logger.debug(f"添加任务: {content}, 时间: {dt}, 类型: {task_type}")
-            # 确保dt是datetime类型
-            if isinstance(dt, str):
-                dt = pd.to_datetime(dt)
-
-            new_task = {
-                "content": content,
-                "datetime": dt,
-                "type": task_type,
-                "cycle_info": (
-                    json.dumps(cycle_info, ensure_ascii=False) if cycle_info else None
-                ),
-                "reminded": False,
-            }
-            new_df = pd.DataFrame([new_task])
-            new_df["datetime"] = pd.to_datetime(new_df["datetime"])
-            self.df = pd.concat([self.df, new_df], ignore_index=True)
-            self.save()
+            new_tasks = [self._make_task(**task) for task in tasks]
+            if not new_tasks:
+                return []
+            logger.debug(f"批量添加任务: {len(new_tasks)} 个")
+            task_ids = self.storage.insert_many([task.to_row() for task in new_tasks])
+            for task_id, task in zip(task_ids, new_tasks):
+                task.id = task_id
+                self.tasks.add(task)
+                self._index_task(task)
+            return task_ids
         except Exception as e:
             logger.error(f"添加任务失败: {e}", exc_info=True)
             raise
 
-    def export_to_excel(self, filepath: str):
-        """导出任务列表为Excel文件"""
+    def export_to_excel(
+        self,
+        filepath: str,
+        include_archived: bool = False,
+        progress=None,
+        is_cancelled=None,
+    ):
+        """流式导出任务列表为Excel文件
+
+        Args:
+            include_archived: 是否包括归档的历史任务
+            progress: 进度回调 progress(已导出数, 总数)
+            is_cancelled: 返回True时中止导出并抛出ExportCancelled，不会留下不完整的文件
+        """
         try:
             logger.debug(f"导出Excel文件: {filepath}")
-            # 创建用于导出的DataFrame副本
-            export_df = self.df.copy()
-
-            # 格式化datetime列
-            export_df["datetime"] = export_df["datetime"].dt.strftime(
-                "%Y-%m-%d %H:%M:%S"
-            )
-
-            # 如果cycle_info是JSON字符串，尝试解析它
-            def format_cycle_info(info):
-                if pd.isna(info):
-                    return ""
-                try:
-                    return json.dumps(json.loads(info), ensure_ascii=False, indent=2)
-                except:
-                    return str(info)
-
-            export_df["cycle_info"] = export_df["cycle_info"].apply(format_cycle_info)
-
-            # 重命名列为中文
-            export_df.columns = ["内容", "时间", "类型", "周期信息", "已提醒"]
-
-            # 导出到Excel
-            export_df.to_excel(filepath, index=False)
+            tasks, total = self._export_tasks(include_archived)
+            export_excel(filepath, tasks, total, progress, is_cancelled)
             logger.debug("Excel导出成功")
+        except ExportCancelled:
+            logger.info("Excel导出已取消")
+            raise
         except Exception as e:
             logger.error(f"导出Excel失败: {e}", exc_info=True)
             raise
 
-    def export_to_txt(self, filepath: str):
-        """导出任务列表为TXT文件"""
+    def export_to_txt(
+        self,
+        filepath: str,
+        include_archived: bool = False,
+        progress=None,
+        is_cancelled=None,
+    ):
+        """流式导出任务列表为TXT文件，参数同export_to_excel"""
         try:
             logger.debug(f"导出TXT文件: {filepath}")
-            with open(filepath, "w", encoding="utf-8") as f:
-                for _, task in self.df.iterrows():
-                    dt_str = task["datetime"].strftime("%Y年%m月%d日%H时%M分")
-                    type_str = "周期任务" if task["type"] != "ONCE" else "单次任务"
-                    cycle_str = ""
-                    if task["cycle_info"]:
-                        try:
-                            cycle_info = json.loads(task["cycle_info"])
-                            cycle_str = f"[周期: {cycle_info.get('type', '')}={cycle_info.get('value', '')}]"
-                        except:
-                            cycle_str = f"[周期: {task['cycle_info']}]"
-
-                    f.write(f"{task['content']} - {dt_str} - {type_str}{cycle_str}\n")
+            tasks, total = self._export_tasks(include_archived)
+            export_txt(filepath, tasks, total, progress, is_cancelled)
             logger.debug("TXT导出成功")
+        except ExportCancelled:
+            logger.info("TXT导出已取消")
+            raise
         except Exception as e:
             logger.error(f"导出TXT失败: {e}", exc_info=True)
             raise
 
-    def get_upcoming_tasks(self, include_reminded=False):
-        """获取即将到来的任务"""
-        now = datetime.now()
-        # 获取未来30分钟内的任务（包括周期任务）
-        max_check_time = now + timedelta(minutes=max(AppConfig.REMINDER_TIMES))
-
-        upcoming = self.df[
-            ((self.df["datetime"] > now) & (self.df["datetime"] <= max_check_time))
-            | (self.df["type"] != "ONCE")  # 包含所有周期任务
-        ].copy()
-
-        if not include_reminded:
-            upcoming = upcoming[~upcoming["reminded"]]
+    def mark_reminded(self, task_id, occurrence: datetime = None):
+        """标记任务为已提醒
 
-        return upcoming.sort_values("datetime")
-
-    def mark_reminded(self, index):
-        """标记任务为已提醒"""
+        周期任务只记录完成了哪一次发生（默认为索引中的下一次），任务本身保留，
+        下一次发生由规则生成。
+        """
         try:
-            self.df.at[index, "reminded"] = True
-            self.save()
-            logger.debug(f"任务已标记为已提醒: {index}")
+            task = self.tasks[task_id]
+            if task.is_recurring:
+                if occurrence is None:
+                    occurrence = self.due_index.get(task_id) or task.next_occurrence()
+                if task.last_done is None or occurrence > task.last_done:
+                    task.last_done = occurrence
+                self.storage.update(task_id, {"last_done": task.last_done})
+            else:
+                task.reminded = True
+                self.storage.update(task_id, {"reminded": True})
+            self._index_task(task)
+            logger.debug(f"任务已标记为已提醒: {task_id}")
         except Exception as e:
             logger.error(f"标记任务提醒状态失败: {e}", exc_info=True)
 
-    def _calculate_next_execution(self, task):
-        """计算周期任务的下一次执行时间"""
-        now = datetime.now()
-        cycle_info = json.loads(task["cycle_info"]) if task["cycle_info"] else {}
-
-        if task["type"] == "DAILY":
-            time_str = cycle_info.get("time", "00:00")
-            hour, minute = map(int, time_str.split(":"))
-            next_time = now.replace(hour=hour, minute=minute)
-            if next_time <= now:
-                next_time = next_time + timedelta(days=1)
-
-        elif task["type"] == "WEEKLY":
-            weekday_map = {
-                "周一": 0,
-                "周二": 1,
-                "周三": 2,
-                "周四": 3,
-                "周五": 4,
-                "周六": 5,
-                "周日": 6,
-            }
-            target_weekday = weekday_map.get(cycle_info.get("day", "周一"), 0)
-            time_str = cycle_info.get("time", "00:00")
-            hour, minute = map(int, time_str.split(":"))
-
-            next_time = now
-            while next_time.weekday() != target_weekday:
-                next_time += timedelta(days=1)
-            next_time = next_time.replace(hour=hour, minute=minute)
-            if next_time <= now:
-                next_time += timedelta(days=7)
-
-        elif task["type"] == "MONTHLY":
-            target_day = int(cycle_info.get("day", "1"))
-            time_str = cycle_info.get("time", "00:00")
-            hour, minute = map(int, time_str.split(":"))
-
-            next_time = now.replace(day=1, hour=hour, minute=minute)
-            while next_time.day != target_day:
-                next_time += timedelta(days=1)
-            if next_time <= now:
-                if next_time.month == 12:
-                    next_time = next_time.replace(year=next_time.year + 1, month=1)
+    def occurrences(self, start: datetime, end: datetime):
+        """获取 [start, end) 内所有任务的每一次发生
+
+        周期任务按规则批量展开，一次性任务按其时间筛选。
+
+        Returns:
+            按时间排序的NumPy结构化数组，字段为 task_id 和 time（datetime64[m]）
+        """
+        if self._occurrence_table is None:
+            once, recurring = [], []
+            for task_id, dt, rule in self.tasks.select("id", "datetime", "rule"):
+                if rule is None:
+                    once.append((task_id, dt))
                 else:
-                    next_time = next_time.replace(month=next_time.month + 1)
+                    recurring.append(task_id)
+            self._occurrence_table = (
+                RuleTable(self.tasks[task_id] for task_id in recurring),
+                np.array([task_id for task_id, _ in once], dtype=np.int64),
+                np.array([dt for _, dt in once], dtype="M8[m]"),
+            )
+        rule_table, once_ids, once_times = self._occurrence_table
+
+        start64, end64 = np.datetime64(start, "m"), np.datetime64(end, "m")
+        mask = (once_times >= start64) & (once_times < end64)
+        once = np.empty(int(mask.sum()), dtype=OCCURRENCE_DTYPE)
+        once["task_id"] = once_ids[mask]
+        once["time"] = once_times[mask]
+
+        result = np.concatenate([rule_table.expand(start, end), once])
+        return result[np.argsort(result["time"], kind="stable")]
+
+    def search(self, query: str, limit: int = 50):
+        """按内容搜索任务
+
+        query中以空白分隔的多个词须全部出现在任务内容中（不区分大小写），
+        输入到一半的词也能匹配。尚未到来的任务按下一次发生时间由近到远排在前面，
+        其余（已过去的一次性任务和尚未补发的周期任务发生）按时间由近到远排在后面，
+        最多返回limit个。
+
+        只读取触发时间索引，不跳过错过的发生，错过的提醒仍由提醒逻辑补发。
+        """
+        task_ids = self.matches(query)
+        if not task_ids or limit <= 0:
+            return []
+        now = datetime.now()
 
-        return next_time
+        upcoming = self._first_upcoming(task_ids, now, limit)
+        found = [self.tasks[task_id] for task_id in upcoming]
+        if len(found) < limit:
+            # 已过去的任务只有尚未归档的几天，数量有限
+            upcoming = set(upcoming)
+            get = self.due_index.get
+            found += heapq.nlargest(
+                limit - len(found),
+                (self.tasks[task_id] for task_id in task_ids if task_id not in upcoming),
+                key=lambda task: get(task.id) or task.datetime,
+            )
+        return found
+
+    def matches(self, query: str) -> set:
+        """内容与query匹配的任务id集合，匹配规则同search，不排序也不限数量"""
+        if self._search_index is None:
+            self._search_index = SearchIndex()
+            self._search_index.rebuild(self.tasks.select("id", "content"))
+        return self._search_index.search(query)
+
+    def _first_upcoming(self, task_ids: set, now: datetime, limit: int) -> list:
+        """task_ids中触发时间晚于now的前limit个任务id，按触发时间排序
+
+        匹配的任务较多时从now起沿触发时间索引查找，很快就能凑满limit个；
+        索引中走过的条目超过匹配数时改为只对匹配的任务排序，两种方式的耗时
+        都不超过匹配数的常数倍。
+        """
+        found = []
+        budget = len(task_ids)
+        for _, task_id in self.due_index.after(now):
+            if task_id in task_ids:
+                found.append(task_id)
+                if len(found) == limit:
+                    return found
+            budget -= 1
+            if budget < 0:
+                break
+        else:
+            return found
+
+        get = self.due_index.get
+        due = ((get(task_id), task_id) for task_id in task_ids)
+        return [
+            task_id
+            for _, task_id in heapq.nsmallest(
+                limit, (item for item in due if item[0] is not None and item[0] > now)
+            )
+        ]
 
     def get_all_tasks(self):
         """获取所有任务"""
-        return self.df.sort_values("datetime")
+        return self.tasks.views(self.tasks.ids_by_time())
+
+    def get_tasks_on(self, day: date):
+        """获取某一天的任务（包括当天有发生的周期任务），按当天的发生时间排序"""
+        if self._day_index is None:
+            self._day_index = DayIndex()
+            self._day_index.rebuild(self.tasks.select("id", "datetime", "rule"))
+        return [self.tasks[task_id] for _, task_id in self._day_index.on(day)]
 
     def get_today_tasks(self):
         """获取今日任务"""
-        self.df["datetime"] = pd.to_datetime(self.df["datetime"])
-        today = datetime.now().date()
-        tomorrow = today + timedelta(days=1)
-        mask = (self.df["datetime"].dt.date >= today) & (
-            self.df["datetime"].dt.date < tomorrow
-        )
-        return self.df[mask].sort_values("datetime")
+        return self.get_tasks_on(datetime.now().date())
+
+    def get_tomorrow_tasks(self):
+        """获取明日任务"""
+        return self.get_tasks_on(datetime.now().date() + timedelta(days=1))
 
     def get_recurring_tasks(self):
         """获取所有周期性任务"""
-        return self.df[self.df["type"] != "ONCE"].sort_values("datetime")
+        return self.tasks.views(self.tasks.ids_by_time(recurring=True))
 
     def clear_all(self):
         """清除所有任务"""
         logger.debug("清除所有任务")
-        self.df = pd.DataFrame(
-            {
-                "content": [],
-                "datetime": [],
-                "type": [],
-                "cycle_info": [],
-                "reminded": [],
-            }
-        )
-        self.save()
+        self.storage.clear()
+        self.tasks.clear()
+        self._occurrence_table = None
+        self.due_index.clear()
+        if self._search_index is not None:
+            self._search_index.clear()
+        if self._day_index is not None:
+            self._day_index.clear()
+        self._notify(None)
 
     def update_task(
         self,
-        index: int,
+        task_id: int,
         content: str = None,
         dt: datetime = None,
         task_type: str = None,
         cycle_info: dict = None,
+        reminder_offsets=None,
     ):
-        """更新任务信息"""
+        """更新任务信息
+
+        参数为None的字段保持不变；reminder_offsets传入空列表时恢复默认提醒时间点。
+        全部字段校验通过后才修改任务，任一字段无效时任务保持原样。
+        """
         try:
             logger.debug(
-                f"更新任务 {index}: {content}, {dt}, {task_type}, {cycle_info}"
+                f"更新任务 {task_id}: {content}, {dt}, {task_type}, {cycle_info}"
+            )
+            task = self.tasks[task_id]
+            self._check_fields(content, task_type, cycle_info, reminder_offsets)
+            if dt is not None:
+                dt = _to_datetime(dt)
+            offsets = (
+                task.reminder_offsets
+                if reminder_offsets is None
+                else parse_reminder_offsets(reminder_offsets)
             )
+
             if content is not None:
-                self.df.at[index, "content"] = content
+                task.content = content
             if dt is not None:
-                self.df.at[index, "datetime"] = dt
-            if task_type is not None:
-                self.df.at[index, "type"] = task_type
+                task.datetime = dt
             if cycle_info is not None:
-                self.df.at[index, "cycle_info"] = json.dumps(
-                    cycle_info, ensure_ascii=False
-                )
-            self.save()
+                task.cycle = cycle_info or None
+            task.reminder_offsets = offsets
+            task.compile(task_type)
+            self._index_task(task)
+            self.storage.update(task_id, task.to_row())
         except Exception as e:
             logger.error(f"更新任务失败: {e}", exc_info=True)
             raise
 
-    def delete_task(self, index: int):
+    def delete_task(self, task_id: int):
         """删除指定任务"""
         try:
-            logger.debug(f"删除任务: {index}")
-            self.df = self.df.drop(index)
-            self.df = self.df.reset_index(drop=True)
-            self.save()
+            logger.debug(f"删除任务: {task_id}")
+            self.tasks.remove(task_id)
+            self._unindex_task(task_id)
+            self.storage.delete(task_id)
         except Exception as e:
             logger.error(f"删除任务失败: {e}", exc_info=True)
             raise
@@ -0,0 +1,48 @@
+import logging
+from PyQt5.QtCore import QThread, pyqtSignal
+from .exporter import ExportCancelled
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+
+class ExportWorker(QThread):
+    """在后台线程中导出任务，导出期间界面保持响应"""
+
+    progress = pyqtSignal(int, int)  # 已导出数, 总数
+    succeeded = pyqtSignal(str)  # 导出文件路径
+    cancelled = pyqtSignal()
+    error = pyqtSignal(str)
+
+    def __init__(self, export_func, filepath: str, include_archived: bool = False):
+        """
+        Args:
+            export_func: DataManager.export_to_excel 或 export_to_txt
+        """
+        super().__init__()
+        self.export_func = export_func
+        self.filepath = filepath
+        self.include_archived = include_archived
+        self._cancel_requested = False
+
+    def run(self):
+        try:
+            self.export_func(
+                self.filepath,
+                self.include_archived,
+                progress=self.progress.emit,
+                is_cancelled=self.is_cancelled,
+            )
+            self.succeeded.emit(self.filepath)
+        except ExportCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            logger.error(f"导出线程错误: {e}")
+            self.error.emit(str(e))
+
+    def cancel(self):
+        """请求取消导出，导出线程在下一次检查时停止"""
+        self._cancel_requested = True
+
+    def is_cancelled(self) -> bool:
+        return self._cancel_requested
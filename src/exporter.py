@@ -0,0 +1,99 @@
+import os
+import json
+import logging
+from pathlib import Path
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+EXCEL_COLUMNS = ["内容", "时间", "类型", "周期信息", "已提醒"]
+PROGRESS_STEP = 1000  # 每导出多少个任务报告一次进度
+
+
+class ExportCancelled(Exception):
+    """导出被用户取消"""
+
+
+def excel_rows(tasks):
+    """逐个生成Excel导出的行，列名使用中文，周期信息格式化为便于阅读的JSON"""
+    for task in tasks:
+        yield (
+            task.content,
+            task.datetime.strftime("%Y-%m-%d %H:%M:%S") if task.datetime else "",
+            task.type,
+            json.dumps(task.cycle, ensure_ascii=False, indent=2) if task.cycle else "",
+            task.reminded,
+        )
+
+
+def txt_lines(tasks):
+    """逐个生成TXT导出的行"""
+    for task in tasks:
+        dt_str = task.datetime.strftime("%Y年%m月%d日%H时%M分") if task.datetime else ""
+        type_str = "周期任务" if task.is_recurring else "单次任务"
+        cycle_str = ""
+        if task.cycle:
+            cycle_str = f"[周期: {task.cycle.get('type', '')}={task.cycle.get('value', '')}]"
+        yield f"{task.content} - {dt_str} - {type_str}{cycle_str}\n"
+
+
+def _stream(items, total: int, progress=None, is_cancelled=None):
+    """转发items，每PROGRESS_STEP项检查一次取消并报告进度"""
+    done = 0
+    for item in items:
+        yield item
+        done += 1
+        if done % PROGRESS_STEP == 0:
+            if is_cancelled is not None and is_cancelled():
+                raise ExportCancelled()
+            if progress is not None:
+                progress(done, total)
+    if progress is not None:
+        progress(done, total)
+
+
+def _write_atomic(filepath, write):
+    """写入同目录下的临时文件，成功后替换目标文件，失败或取消时删除临时文件"""
+    path = Path(filepath)
+    temp_file = path.with_name(f"{path.stem}.tmp{path.suffix}")
+    try:
+        write(temp_file)
+        os.replace(temp_file, path)
+    except BaseException:
+        if temp_file.exists():
+            temp_file.unlink()
+        raise
+
+
+def export_excel(filepath, tasks, total: int, progress=None, is_cancelled=None):
+    """以openpyxl只写模式流式导出Excel，内存占用与任务数无关
+
+    Args:
+        tasks: 任务的可迭代对象，逐个读取
+        total: 任务总数，仅用于报告进度
+        progress: 进度回调 progress(已导出数, 总数)
+        is_cancelled: 返回True时中止导出并抛出ExportCancelled
+    """
+
+    def write(temp_file):
+        # 只在导出时载入openpyxl，不拖慢启动
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(EXCEL_COLUMNS)
+        for row in _stream(excel_rows(tasks), total, progress, is_cancelled):
+            sheet.append(row)
+        workbook.save(temp_file)
+
+    _write_atomic(filepath, write)
+
+
+def export_txt(filepath, tasks, total: int, progress=None, is_cancelled=None):
+    """逐行流式导出TXT，参数同export_excel"""
+
+    def write(temp_file):
+        with open(temp_file, "w", encoding="utf-8") as f:
+            f.writelines(_stream(txt_lines(tasks), total, progress, is_cancelled))
+
+    _write_atomic(filepath, write)
@@ -0,0 +1,50 @@
+import logging
+from PyQt5.QtCore import QThread, pyqtSignal
+from .importer import ImportCancelled, ImportJob, parse_ai_tasks
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+
+class ImportWorker(QThread):
+    """在后台线程中分块并发地调用AI服务解析导入文件
+
+    解析结果通过chunk_parsed信号交给主线程写入，DataManager只在主线程中修改。
+    """
+
+    chunk_parsed = pyqtSignal(int, list)  # 块序号, 任务字典列表
+    progress = pyqtSignal(int, int)  # 已处理块数, 总块数
+    succeeded = pyqtSignal(list)  # 失败的块序号
+    cancelled = pyqtSignal()
+    error = pyqtSignal(str)
+
+    def __init__(self, ai_service, job: ImportJob):
+        super().__init__()
+        self.ai_service = ai_service
+        self.job = job
+        self._cancel_requested = False
+
+    def _parse(self, text: str) -> list:
+        return parse_ai_tasks(self.ai_service.process_input(text))
+
+    def run(self):
+        try:
+            failed = self.job.run(
+                self._parse,
+                self.chunk_parsed.emit,
+                progress=self.progress.emit,
+                is_cancelled=self.is_cancelled,
+            )
+            self.succeeded.emit(failed)
+        except ImportCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            logger.error(f"导入线程错误: {e}")
+            self.error.emit(str(e))
+
+    def cancel(self):
+        """请求取消导入，已完成的块会保留，再次导入同一文件时继续"""
+        self._cancel_requested = True
+
+    def is_cancelled(self) -> bool:
+        return self._cancel_requested
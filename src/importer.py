@@ -0,0 +1,221 @@
+import os
+import json
+import hashlib
+import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from .config import AppConfig
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+
+class ImportCancelled(Exception):
+    """导入被用户取消"""
+
+
+def parse_ai_tasks(result: str) -> list:
+    """将AI返回的结果解析为DataManager.add_tasks使用的任务字典列表"""
+    tasks = eval(result, {"__builtins__": {}}, {})
+    new_tasks = []
+    for task in tasks:
+        if not isinstance(task, dict):
+            raise ValueError(f"任务格式错误: {task}")
+        # 从AI返回结果中提取信息，并将时间元组转换为datetime对象
+        new_tasks.append(
+            {
+                "content": task["事项"],
+                "dt": datetime(*task["时间"]),
+                "task_type": task["类型"],
+                "cycle_info": task["周期"],
+            }
+        )
+    return new_tasks
+
+
+def iter_txt_lines(filepath):
+    """逐行读取TXT文件，跳过空行"""
+    with open(filepath, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield line
+
+
+def iter_excel_lines(filepath):
+    """以只读模式逐行读取Excel第一个工作表，跳过表头，每行的非空单元格以空格连接"""
+    # 只在导入Excel时载入openpyxl，不拖慢启动
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(filepath, read_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(min_row=2, values_only=True)
+        for row in rows:
+            line = " ".join(str(value) for value in row if value is not None)
+            if line.strip():
+                yield line
+    finally:
+        workbook.close()
+
+
+def iter_lines(filepath):
+    """按扩展名选择读取方式"""
+    if Path(filepath).suffix.lower() in (".xlsx", ".xlsm"):
+        return iter_excel_lines(filepath)
+    return iter_txt_lines(filepath)
+
+
+class ImportJob:
+    """分块导入一个文件
+
+    文件按chunk_lines行切分，每块单独交给AI服务解析。已写入的块记录在
+    导入状态文件中，导入中途失败或取消后再次导入同一文件时跳过这些块。
+    文件内容或分块大小改变后状态作废，从头导入。
+    """
+
+    def __init__(self, filepath, chunk_lines: int = None):
+        self.filepath = os.path.abspath(filepath)
+        self.chunk_lines = chunk_lines or AppConfig.IMPORT_CHUNK_LINES
+        stat = os.stat(self.filepath)
+        self.fingerprint = f"{stat.st_size}:{stat.st_mtime_ns}:{self.chunk_lines}"
+        key = hashlib.sha1(self.filepath.encode("utf-8")).hexdigest()
+        self.state_file = Path(AppConfig.IMPORT_STATE_DIR) / f"{key}.json"
+        self.done = self._load_state()
+
+    def _load_state(self) -> set:
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return set()
+        if state.get("fingerprint") != self.fingerprint:
+            return set()
+        logger.info(f"继续上次未完成的导入: 已完成 {len(state['done'])} 块")
+        return set(state["done"])
+
+    def _save_state(self):
+        os.makedirs(self.state_file.parent, exist_ok=True)
+        temp_file = self.state_file.with_suffix(".tmp")
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "filepath": self.filepath,
+                    "fingerprint": self.fingerprint,
+                    "done": sorted(self.done),
+                },
+                f,
+            )
+        os.replace(temp_file, self.state_file)
+
+    def chunks(self):
+        """逐块生成 (块序号, 文本)，跳过已完成的块"""
+        chunk = []
+        index = 0
+        for line in iter_lines(self.filepath):
+            chunk.append(line)
+            if len(chunk) == self.chunk_lines:
+                if index not in self.done:
+                    yield index, "\n".join(chunk)
+                chunk = []
+                index += 1
+        if chunk and index not in self.done:
+            yield index, "\n".join(chunk)
+
+    def count_chunks(self) -> int:
+        """文件的总块数（需要完整读一遍文件）"""
+        lines = sum(1 for _ in iter_lines(self.filepath))
+        return -(-lines // self.chunk_lines)
+
+    def mark_done(self, index: int):
+        """记录一块已写入存储"""
+        self.done.add(index)
+        self._save_state()
+
+    def finish(self):
+        """全部导入完成后删除状态文件"""
+        try:
+            os.remove(self.state_file)
+        except FileNotFoundError:
+            pass
+
+    def run(
+        self,
+        parse,
+        on_result,
+        max_workers: int = None,
+        progress=None,
+        is_cancelled=None,
+    ) -> list:
+        """用有界线程池并发解析各块
+
+        同时进行的请求不超过max_workers个，文件按需读取，不会一次载入内存。
+        每块解析完成后（按完成顺序）在调用线程中调用on_result(块序号, 任务列表)。
+        解析失败的块重试IMPORT_RETRIES次后跳过，不影响其他块。
+
+        Args:
+            parse: 将一块文本解析为任务字典列表的函数，在工作线程中调用
+            on_result: 接收解析结果的回调，负责写入并调用mark_done
+            progress: 进度回调 progress(已处理块数, 总块数)
+            is_cancelled: 返回True时中止导入并抛出ImportCancelled
+
+        Returns:
+            失败的块序号列表。没有失败且全部结果写入后，由调用方调用finish()
+        """
+        max_workers = max_workers or AppConfig.IMPORT_MAX_WORKERS
+        total = self.count_chunks()
+        processed = len(self.done)
+        failed = []
+
+        def parse_with_retry(text):
+            for attempt in range(AppConfig.IMPORT_RETRIES + 1):
+                try:
+                    return parse(text)
+                except Exception as e:
+                    if attempt == AppConfig.IMPORT_RETRIES:
+                        raise
+                    logger.warning(f"解析失败，重试第 {attempt + 1} 次: {e}")
+
+        def collect(futures):
+            # 限时等待，请求迟迟不返回时也能及时响应取消
+            nonlocal processed
+            finished, _ = wait(
+                futures,
+                timeout=AppConfig.IMPORT_CANCEL_POLL,
+                return_when=FIRST_COMPLETED,
+            )
+            for future in finished:
+                index = futures.pop(future)
+                try:
+                    tasks = future.result()
+                except Exception as e:
+                    logger.error(f"第 {index} 块导入失败: {e}")
+                    failed.append(index)
+                else:
+                    on_result(index, tasks)
+                processed += 1
+                if progress is not None:
+                    progress(processed, total)
+
+        def check_cancelled():
+            if is_cancelled is not None and is_cancelled():
+                raise ImportCancelled()
+
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        futures = {}
+        try:
+            for index, text in self.chunks():
+                check_cancelled()
+                futures[executor.submit(parse_with_retry, text)] = index
+                while len(futures) >= max_workers:
+                    check_cancelled()
+                    collect(futures)
+            while futures:
+                check_cancelled()
+                collect(futures)
+        except BaseException:
+            # 尚未开始的请求直接取消，已在进行的请求不再等待，结果丢弃，下次导入时重做
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+        return sorted(failed)
@@ -0,0 +1,62 @@
+import os
+import logging
+from .config import AppConfig
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+if os.name == "nt":
+    import msvcrt
+
+    def _lock(file):
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+
+    def _unlock(file):
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+else:
+    import fcntl
+
+    def _lock(file):
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _unlock(file):
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+
+class InstanceLock:
+    """应用目录中的独占锁文件，保证同一时间只有一个进程读写任务数据
+
+    界面程序和无界面提醒服务使用同一个锁文件。锁由操作系统持有，
+    进程异常退出后自动释放，不会残留。
+    """
+
+    def __init__(self, path=None):
+        self.path = path or AppConfig.LOCK_FILE
+        self._file = None
+
+    def acquire(self) -> bool:
+        """尝试取得锁，已被其他进程持有时立即返回False"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        file = open(self.path, "a+")
+        try:
+            _lock(file)
+        except OSError:
+            file.close()
+            logger.warning(f"锁文件已被其他进程持有: {self.path}")
+            return False
+        self._file = file
+        return True
+
+    def release(self):
+        """释放锁，可重复调用"""
+        if self._file is None:
+            return
+        try:
+            _unlock(self._file)
+        except OSError as e:
+            logger.warning(f"释放锁文件失败: {e}")
+        self._file.close()
+        self._file = None
@@ -0,0 +1,256 @@
+import calendar
+import logging
+from datetime import datetime, timedelta
+from functools import lru_cache
+import numpy as np
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+WEEKDAY_MAP = {
+    "周一": 0,
+    "周二": 1,
+    "周三": 2,
+    "周四": 3,
+    "周五": 4,
+    "周六": 5,
+    "周日": 6,
+    "周天": 6,
+    "星期一": 0,
+    "星期二": 1,
+    "星期三": 2,
+    "星期四": 3,
+    "星期五": 4,
+    "星期六": 5,
+    "星期日": 6,
+    "星期天": 6,
+}
+
+DAILY, WEEKLY, MONTHLY = "DAILY", "WEEKLY", "MONTHLY"
+
+# occurrences查询的结果类型：(任务id, 发生时间)
+OCCURRENCE_DTYPE = np.dtype([("task_id", "<i8"), ("time", "<M8[m]")])
+
+_ONE_DAY = np.timedelta64(1, "D")
+_ONE_WEEK = np.timedelta64(7, "D")
+
+
+class RecurrenceRule:
+    """编译后的周期规则，下一次发生时间由算术直接得出，不逐日步进
+
+    MONTHLY规则的日期超过当月天数时取当月最后一天（如31号在4月为30号）。
+    相同的规则共享同一个对象（见_make_rule），创建后不应修改。
+    """
+
+    __slots__ = ("freq", "hour", "minute", "weekday", "day")
+
+    def __init__(self, freq: str, hour: int, minute: int, weekday=None, day=None):
+        self.freq = freq
+        self.hour = hour
+        self.minute = minute
+        self.weekday = weekday
+        self.day = day
+
+    def _at(self, year: int, month: int, day: int) -> datetime:
+        return datetime(year, month, day, self.hour, self.minute)
+
+    def _in_month(self, year: int, month: int) -> datetime:
+        last_day = calendar.monthrange(year, month)[1]
+        return self._at(year, month, min(self.day, last_day))
+
+    def next_after(self, after: datetime) -> datetime:
+        """返回严格晚于after的第一次发生时间"""
+        if self.freq == DAILY:
+            candidate = self._at(after.year, after.month, after.day)
+            if candidate <= after:
+                candidate += timedelta(days=1)
+            return candidate
+
+        if self.freq == WEEKLY:
+            days_ahead = (self.weekday - after.weekday()) % 7
+            candidate = self._at(after.year, after.month, after.day) + timedelta(
+                days=days_ahead
+            )
+            if candidate <= after:
+                candidate += timedelta(days=7)
+            return candidate
+
+        candidate = self._in_month(after.year, after.month)
+        if candidate <= after:
+            year, month = divmod(after.year * 12 + after.month, 12)
+            candidate = self._in_month(year, month + 1)
+        return candidate
+
+    def __repr__(self):
+        return (
+            f"RecurrenceRule({self.freq}, {self.hour:02d}:{self.minute:02d}, "
+            f"weekday={self.weekday}, day={self.day})"
+        )
+
+
+@lru_cache(maxsize=4096)
+def _make_rule(freq: str, hour: int, minute: int, weekday=None, day=None):
+    return RecurrenceRule(freq, hour, minute, weekday, day)
+
+
+def _parse_time(cycle_info: dict, anchor: datetime) -> tuple:
+    time_str = cycle_info.get("time")
+    if time_str:
+        hour, minute = map(int, str(time_str).split(":")[:2])
+        if not (0 <= hour < 24 and 0 <= minute < 60):
+            raise ValueError(f"时间超出范围: {time_str}")
+        return hour, minute
+    if anchor is not None:
+        return anchor.hour, anchor.minute
+    return 0, 0
+
+
+def _parse_weekday(cycle_info: dict, anchor: datetime) -> int:
+    value = cycle_info.get("day") or cycle_info.get("weekday")
+    if value in WEEKDAY_MAP:
+        return WEEKDAY_MAP[value]
+    if isinstance(value, int) or (isinstance(value, str) and value.isdigit()):
+        # 数字按1=周一、7=周日处理
+        return (int(value) - 1) % 7
+    if anchor is not None:
+        return anchor.weekday()
+    return 0
+
+
+def _parse_month_day(cycle_info: dict, anchor: datetime) -> int:
+    value = cycle_info.get("day")
+    if value is not None:
+        day = int(str(value).rstrip("日号"))
+        if not 1 <= day <= 31:
+            raise ValueError(f"日期超出范围: {value}")
+        return day
+    if anchor is not None:
+        return anchor.day
+    return 1
+
+
+def is_self_contained(task_type: str, cycle_info: dict) -> bool:
+    """cycle_info是否包含编译所需的全部字段（编译结果与任务时间无关）"""
+    if not cycle_info or not cycle_info.get("time"):
+        return False
+    if task_type == DAILY:
+        return True
+    return bool(cycle_info.get("day") or cycle_info.get("weekday"))
+
+
+def compile_rule(task_type: str, cycle_info: dict, anchor: datetime = None):
+    """将任务类型和cycle_info编译为RecurrenceRule，一次性任务返回None
+
+    cycle_info中缺少的字段由anchor（任务时间）补全，相同的规则返回同一个对象。
+    """
+    if task_type not in (DAILY, WEEKLY, MONTHLY):
+        return None
+    cycle_info = cycle_info or {}
+    try:
+        hour, minute = _parse_time(cycle_info, anchor)
+        if task_type == DAILY:
+            return _make_rule(DAILY, hour, minute)
+        if task_type == WEEKLY:
+            return _make_rule(
+                WEEKLY, hour, minute, weekday=_parse_weekday(cycle_info, anchor)
+            )
+        return _make_rule(
+            MONTHLY, hour, minute, day=_parse_month_day(cycle_info, anchor)
+        )
+    except (TypeError, ValueError) as e:
+        logger.warning(f"周期信息无效，改用任务时间: {cycle_info}, {e}")
+        return compile_rule(task_type, None, anchor)
+
+
+def _expand_periodic(task_ids, first, period, end):
+    """展开固定周期的规则：每条规则从first开始每隔period发生一次，直到end之前"""
+    counts = np.where(first < end, (end - first - 1) // period + 1, 0).astype(np.int64)
+    total = int(counts.sum())
+    owner = np.repeat(np.arange(len(first)), counts)
+    # 每次发生在所属规则内的序号
+    step = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    result = np.empty(total, dtype=OCCURRENCE_DTYPE)
+    result["task_id"] = task_ids[owner]
+    result["time"] = first[owner] + step * period
+    return result
+
+
+class RuleTable:
+    """全部周期任务规则的列式表示，用NumPy datetime64批量展开发生时间
+
+    每个任务的发生时间不早于任务本身的时间（anchor）。
+    """
+
+    def __init__(self, tasks):
+        tasks = [task for task in tasks if task.rule is not None]
+        freqs = np.array([task.rule.freq for task in tasks], dtype=object)
+        self.task_ids = np.array([task.id for task in tasks], dtype=np.int64)
+        self.minute_of_day = np.array(
+            [task.rule.hour * 60 + task.rule.minute for task in tasks], dtype=np.int64
+        ).astype("m8[m]")
+        self.weekday = np.array(
+            [task.rule.weekday or 0 for task in tasks], dtype=np.int64
+        )
+        self.day = np.array([task.rule.day or 1 for task in tasks], dtype=np.int64)
+        self.anchor = np.array(
+            [task.datetime for task in tasks], dtype="M8[m]"
+        )
+        self.daily = np.flatnonzero(freqs == DAILY)
+        self.weekly = np.flatnonzero(freqs == WEEKLY)
+        self.monthly = np.flatnonzero(freqs == MONTHLY)
+
+    def __len__(self):
+        return len(self.task_ids)
+
+    def expand(self, start: datetime, end: datetime) -> np.ndarray:
+        """返回 [start, end) 内全部发生时间，按时间排序"""
+        start = np.datetime64(start, "m")
+        end = np.datetime64(end, "m")
+        parts = [
+            self._expand_daily(start, end),
+            self._expand_weekly(start, end),
+            self._expand_monthly(start, end),
+        ]
+        result = np.concatenate(parts)
+        return result[np.argsort(result["time"], kind="stable")]
+
+    def _lower(self, idx, start):
+        return np.maximum(self.anchor[idx], start)
+
+    def _expand_daily(self, start, end):
+        idx = self.daily
+        lower = self._lower(idx, start)
+        first = lower.astype("M8[D]").astype("M8[m]") + self.minute_of_day[idx]
+        first = np.where(first < lower, first + _ONE_DAY, first)
+        return _expand_periodic(self.task_ids[idx], first, _ONE_DAY, end)
+
+    def _expand_weekly(self, start, end):
+        idx = self.weekly
+        lower = self._lower(idx, start)
+        lower_day = lower.astype("M8[D]")
+        # 1970-01-01是周四（weekday=3）
+        lower_weekday = (lower_day.astype(np.int64) + 3) % 7
+        days_ahead = (self.weekday[idx] - lower_weekday) % 7
+        first = (lower_day + days_ahead).astype("M8[m]") + self.minute_of_day[idx]
+        first = np.where(first < lower, first + _ONE_WEEK, first)
+        return _expand_periodic(self.task_ids[idx], first, _ONE_WEEK, end)
+
+    def _expand_monthly(self, start, end):
+        idx = self.monthly
+        first_month = start.astype("M8[M]")
+        last_month = (end - np.timedelta64(1, "m")).astype("M8[M]")
+        months = np.arange(first_month, last_month + 1)
+        month_start = months.astype("M8[D]")
+        days_in_month = ((months + 1).astype("M8[D]") - month_start).astype(np.int64)
+
+        # 规则 × 月份 的二维网格，日期超过当月天数时取月末
+        day = np.minimum(self.day[idx][:, None], days_in_month[None, :])
+        times = (month_start[None, :] + (day - 1)).astype("M8[m]") + self.minute_of_day[
+            idx
+        ][:, None]
+        mask = (times >= self._lower(idx, start)[:, None]) & (times < end)
+        rows, _ = np.nonzero(mask)
+        result = np.empty(len(rows), dtype=OCCURRENCE_DTYPE)
+        result["task_id"] = self.task_ids[idx][rows]
+        result["time"] = times[mask]
+        return result
@@ -0,0 +1,369 @@
+from datetime import datetime, timedelta
+import time
+from .config import AppConfig
+from .reminder_ledger import ReminderLedger
+from .scheduler import create_scheduler
+from .tts_cache import cache_key
+from .tts_worker import PresynthWorker, TTSWorker
+import logging
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+
+class ReminderCore:
+    """事件驱动的提醒逻辑，不依赖Qt
+
+    调度队列中保存每个任务下一次发生在各提醒时间点的具体触发时间，
+    单次定时器只在最早的触发时间唤醒，任务变更时重新设置定时器，
+    没有到期的提醒时不做任何轮询。
+
+    另一个调度队列按提前TTS_PRESYNTH_MINUTES分钟的时间安排同样的提醒，
+    到时在后台预先合成提醒语音，提醒触发时直接播放缓存中的语音。
+
+    启动时以及检测到系统休眠、时钟调整后，离线期间错过的发生合并为一条
+    通知补发。
+
+    定时器和通知方式由子类提供：子类实现_start_timer、_stop_timer和_notify，
+    在定时器到期时调用check_reminders，准备好接收通知后调用_start。
+    """
+
+    def __init__(self, data_manager):
+        self.data_manager = data_manager
+        self.reminder_times = AppConfig.REMINDER_TIMES  # 任务未设置提醒时间点时使用
+        self.scheduler = create_scheduler()
+        self.archived_on = datetime.now().date()  # 启动时DataManager已归档过
+        # 已送达的提醒记录在磁盘上，重启后不会重复提醒
+        self.ledger = ReminderLedger()
+        # self.sound_player = SoundPlayer()
+        # 语音合成和播放在后台线程中排队进行，不阻塞定时器所在的线程
+        self.tts_worker = TTSWorker()
+        self.tts_worker.start()
+        self.presynth_minutes = AppConfig.TTS_PRESYNTH_MINUTES
+        self.presynth_scheduler = create_scheduler()
+        self.presynth_worker = PresynthWorker()
+        self.presynth_worker.start()
+        self._presynthesized = {}  # task_id -> {提醒时间点: 缓存键}
+        self._armed_clock = None  # 设置定时器时的 (墙上时间, 单调时间, 预期唤醒时间)
+
+        self.data_manager.add_listener(self._on_task_changed)
+
+    def _start_timer(self, delay: int):
+        """设置单次定时器，delay毫秒后调用check_reminders"""
+        raise NotImplementedError
+
+    def _stop_timer(self):
+        """停止定时器"""
+        raise NotImplementedError
+
+    def _notify(self, title: str, message: str):
+        """显示一条提醒通知"""
+        raise NotImplementedError
+
+    def _start(self):
+        """补发错过的提醒并建立调度队列"""
+        # 先补发错过的提醒，此后错过的周期任务发生才会被跳过
+        self._catch_up(datetime.now())
+        self._reschedule_all()
+
+    def _reschedule_all(self):
+        """按当前全部任务重建调度队列"""
+        self.scheduler.clear()
+        self.presynth_scheduler.clear()
+        for task_id in list(self._presynthesized):
+            self._discard_presynthesized(task_id)
+        for task_id, occurs_at in self.data_manager.pending_occurrences():
+            self._schedule(task_id, occurs_at)
+        self._arm()
+
+    def _offsets(self, task_id) -> tuple:
+        """任务的提醒时间点"""
+        task = self.data_manager.tasks.get(task_id)
+        if task is not None and task.reminder_offsets is not None:
+            return task.reminder_offsets
+        return self.reminder_times
+
+    def _schedule(self, task_id, occurs_at: datetime):
+        """安排任务一次发生的提醒及其语音预合成
+
+        各提醒时间点在这里一次换算为具体的触发时间放入调度队列，
+        已为这次发生送达过的时间点不会重复安排。
+        """
+        offsets = self._offsets(task_id)
+        delivered = self.ledger.delivered(task_id, occurs_at)
+        if min(offsets) in delivered:
+            # 最后一个提醒已送达但未来得及标记完成（如送达后程序退出）
+            self.data_manager.mark_reminded(task_id, occurs_at)
+            return
+        offsets = [minutes for minutes in offsets if minutes not in delivered]
+        self.scheduler.schedule(task_id, occurs_at, offsets)
+        if self.presynth_minutes > 0:
+            self.presynth_scheduler.schedule(
+                task_id,
+                occurs_at,
+                [minutes + self.presynth_minutes for minutes in offsets],
+            )
+
+    def _cancel(self, task_id):
+        self.scheduler.cancel(task_id)
+        self.presynth_scheduler.cancel(task_id)
+
+    def _on_task_changed(self, task_id):
+        """任务变更后更新该任务的调度，task_id为None表示全部任务已清除"""
+        if task_id is None:
+            self._reschedule_all()
+            return
+        occurs_at = self.data_manager.next_occurrence(task_id)
+        if occurs_at is None or occurs_at <= datetime.now():
+            self._cancel(task_id)
+            self._discard_presynthesized(task_id)
+        elif occurs_at != self.scheduler.scheduled(task_id):
+            self._discard_presynthesized(task_id)
+            self._schedule(task_id, occurs_at)
+        else:
+            # 发生时间未变，但提醒时间点或内容可能已修改
+            self._schedule(task_id, occurs_at)
+            self._refresh_presynthesized(task_id, occurs_at)
+        self._arm()
+
+    def _presynthesize(self, task_id, minutes: int, occurs_at: datetime):
+        """在后台预合成一条提醒的语音"""
+        task = self.data_manager.tasks.get(task_id)
+        if task is None:
+            return
+        message = self._generate_reminder_message(task.content, minutes, occurs_at)
+        key = cache_key(message)
+        self._presynthesized.setdefault(task_id, {})[minutes] = key
+        self.presynth_worker.request(key, message)
+
+    def _refresh_presynthesized(self, task_id, occurs_at: datetime):
+        """任务修改后作废不再需要的预合成语音，内容改变时重新预合成"""
+        presynthesized = self._presynthesized.get(task_id)
+        if not presynthesized:
+            return
+        task = self.data_manager.tasks.get(task_id)
+        offsets = self._offsets(task_id)
+        for minutes, key in list(presynthesized.items()):
+            if minutes not in offsets:
+                del presynthesized[minutes]
+                self._release(task_id, key)
+                continue
+            message = self._generate_reminder_message(task.content, minutes, occurs_at)
+            if cache_key(message) != key:
+                self._release(task_id, key)
+                self._presynthesize(task_id, minutes, occurs_at)
+
+    def _discard_presynthesized(self, task_id):
+        """任务修改或删除后作废尚未播放的预合成语音"""
+        for key in self._presynthesized.pop(task_id, {}).values():
+            self._release(task_id, key)
+
+    def _release(self, task_id, key: str):
+        """删除一条预合成语音，其他任务仍在使用相同语音时保留"""
+        for other_id, keys in self._presynthesized.items():
+            if other_id != task_id and key in keys.values():
+                return
+        self.presynth_worker.discard(key)
+
+    def _arm(self):
+        """将定时器设置到最早的触发时间
+
+        提醒推迟REMINDER_COALESCE_SECONDS秒触发，其间相继到期的提醒一起送达，
+        提醒不会早于到期时间送达。
+        """
+        fire_times = []
+        fire_time = self.scheduler.next_fire_time()
+        if fire_time is not None:
+            fire_times.append(
+                fire_time + timedelta(seconds=AppConfig.REMINDER_COALESCE_SECONDS)
+            )
+        fire_time = self.presynth_scheduler.next_fire_time()
+        if fire_time is not None:
+            fire_times.append(fire_time)
+        if not fire_times:
+            self._stop_timer()
+            self._armed_clock = None
+            return
+        now = datetime.now()
+        delay = (min(fire_times) - now).total_seconds() * 1000
+        # 等待时间有上限，系统休眠或调整时钟后也能及时重新计算
+        delay = int(min(max(delay, 0), AppConfig.REMINDER_MAX_SLEEP))
+        self._start_timer(delay)
+        self._armed_clock = (now, time.monotonic(), now + timedelta(milliseconds=delay))
+
+    def _clock_jumped(self, now: datetime) -> bool:
+        """自上次设置定时器以来系统是否休眠过或时钟是否被调整
+
+        墙上时间与单调时间走过的时长不一致说明时钟被调整（或单调时间在休眠
+        期间暂停）；唤醒时间远晚于预期说明定时器在休眠期间无法触发。
+        """
+        if self._armed_clock is None:
+            return False
+        armed_at, armed_monotonic, expected = self._armed_clock
+        threshold = AppConfig.REMINDER_CLOCK_JUMP_SECONDS
+        elapsed = (now - armed_at).total_seconds()
+        drift = elapsed - (time.monotonic() - armed_monotonic)
+        late = (now - expected).total_seconds()
+        return abs(drift) > threshold or late > threshold
+
+    def _catch_up(self, now: datetime):
+        """补发错过的提醒
+
+        离线或休眠期间已过去的发生合并为一条通知，并标记为已完成；
+        已送达过的发生只标记完成，不重复通知。
+        """
+        try:
+            occurrences = self.data_manager.missed_occurrences(now)
+            if not occurrences:
+                return
+            missed, records = [], []
+            for task_id, occurs_at, count in occurrences:
+                minutes = min(self._offsets(task_id))
+                if minutes not in self.ledger.delivered(task_id, occurs_at):
+                    records.append((task_id, occurs_at, minutes))
+                    content = self.data_manager.tasks[task_id].content
+                    missed.append((content, occurs_at, count))
+            # 先记录再送达，与正常提醒相同（记录由后台线程写入磁盘）
+            self.ledger.record_many(records)
+            for task_id, occurs_at, count in occurrences:
+                self.data_manager.mark_reminded(task_id, occurs_at)
+            if not missed:
+                return
+
+            text, speech = self._compose_missed_messages(missed, now)
+            self._notify("错过的提醒", text)
+            self.tts_worker.speak(speech)
+            logger.info(f"补发错过的提醒: {len(missed)} 项")
+        except Exception as e:
+            logger.error(f"补发错过的提醒时出错: {e}", exc_info=True)
+
+    def check_reminders(self):
+        """触发全部到期的提醒，并设置下一次唤醒"""
+        try:
+            now = datetime.now()
+            # 每天归档一次过期任务，保持工作集大小有界
+            if now.date() != self.archived_on:
+                self.archived_on = now.date()
+                self.data_manager.archive_completed()
+                self.ledger.prune(now)
+
+            if self._clock_jumped(now):
+                logger.info("检测到系统休眠或时钟调整，检查错过的提醒")
+                self._catch_up(now)
+
+            for task_id, occurs_at, minutes in self.presynth_scheduler.pop_due(now):
+                minutes -= self.presynth_minutes
+                # 只预合成仍有效且尚未到提醒时间的提醒
+                if self.scheduler.scheduled(task_id) != occurs_at:
+                    continue
+                if occurs_at - timedelta(minutes=minutes) <= now:
+                    continue
+                self._presynthesize(task_id, minutes, occurs_at)
+
+            # 已到期的提醒合并为一条通知和一段语音，定时器推迟触发使相继到期的提醒一起送达
+            reminders = []
+            for task_id, occurs_at, minutes in self.scheduler.pop_due(now):
+                task = self.data_manager.tasks.get(task_id)
+                if task is not None:
+                    reminders.append((task_id, task.content, minutes, occurs_at))
+            if not reminders:
+                return
+
+            # 先记录再送达：记录在后台写入磁盘，正常退出后重启不会重复提醒
+            self.ledger.record_many(
+                (task_id, occurs_at, minutes)
+                for task_id, content, minutes, occurs_at in reminders
+            )
+
+            # 生成提醒消息
+            messages = self._compose_messages(reminders)
+
+            # 发送提醒
+            self._notify("备忘提醒", "\n".join(messages))
+            # self.sound_player.play_notification()
+            self.tts_worker.speak("；".join(messages))
+            logger.debug(f"发送提醒: {messages}")
+
+            for task_id, content, minutes, occurs_at in reminders:
+                presynthesized = self._presynthesized.get(task_id)
+                if presynthesized is not None:
+                    presynthesized.pop(minutes, None)
+                    if not presynthesized:
+                        del self._presynthesized[task_id]
+
+                # 如果是最后一次提醒，标记这次发生为已提醒
+                # 周期任务的下一次发生由规则生成，不再新增任务
+                if minutes == min(self._offsets(task_id)):
+                    self.data_manager.mark_reminded(task_id, occurs_at)
+
+        except Exception as e:
+            logger.error(f"检查提醒时出错: {e}", exc_info=True)
+        finally:
+            self._arm()
+
+    def stop(self):
+        """停止定时器和播报线程，退出程序前调用
+
+        语音线程可能阻塞在网络请求或播放中，只等待有限的时间。
+        """
+        self._stop_timer()
+        self.ledger.close()
+        self.presynth_worker.stop(AppConfig.TTS_STOP_TIMEOUT)
+        self.tts_worker.stop(AppConfig.TTS_STOP_TIMEOUT)
+
+    def _compose_messages(self, reminders: list) -> list:
+        """将同时到期的提醒合并为消息列表
+
+        发生时间和提醒时间点都相同的提醒合并为一句，最多列出
+        REMINDER_COALESCE_MAX项，其余只报数量。只有一项时与单独提醒的消息相同，
+        可以使用预合成的语音。
+        """
+        listed = reminders[: AppConfig.REMINDER_COALESCE_MAX]
+        groups = {}
+        for task_id, content, minutes, occurs_at in listed:
+            groups.setdefault((minutes, occurs_at), []).append(content)
+        messages = [
+            self._generate_reminder_message("、".join(contents), minutes, occurs_at)
+            for (minutes, occurs_at), contents in groups.items()
+        ]
+        rest = len(reminders) - len(listed)
+        if rest > 0:
+            messages.append(f"另有{rest}项提醒")
+        return messages
+
+    def _compose_missed_messages(self, missed: list, now: datetime) -> tuple:
+        """生成错过的提醒的通知文本和播报语音
+
+        通知中最多列出REMINDER_COALESCE_MAX项及其时间，语音只报内容。
+
+        Returns:
+            (通知文本, 播报语音)
+        """
+        listed = missed[: AppConfig.REMINDER_COALESCE_MAX]
+        rest = len(missed) - len(listed)
+        lines = []
+        for content, occurs_at, count in listed:
+            time_format = "%H:%M" if occurs_at.date() == now.date() else "%m-%d %H:%M"
+            line = f"{occurs_at.strftime(time_format)} {content}"
+            if count > 1:
+                line += f"（错过{count}次）"
+            lines.append(line)
+        if rest > 0:
+            lines.append(f"另有{rest}项提醒")
+
+        speech = f"您错过了{len(missed)}项提醒：" + "、".join(
+            content for content, occurs_at, count in listed
+        )
+        if rest > 0:
+            speech += f"，另有{rest}项"
+        return "\n".join(lines), speech
+
+    def _generate_reminder_message(
+        self, content: str, minutes: int, task_time: datetime
+    ) -> str:
+        """生成提醒消息"""
+        time_str = task_time.strftime("%H:%M")
+        if minutes > 0:
+            return f"现在是{time_str}，{minutes}分钟后记得{content}"
+        else:
+            return f"现在是{time_str}，该{content}了）"
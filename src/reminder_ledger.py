@@ -0,0 +1,168 @@
+import os
+import struct
+import logging
+import threading
+from datetime import datetime, timedelta
+from .config import AppConfig
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+RECORD = struct.Struct("<qqi")  # task_id, 发生时间（秒）, 提前的分钟数
+EPOCH = datetime(1970, 1, 1)
+
+
+def _seconds(dt: datetime) -> int:
+    return int((dt - EPOCH).total_seconds())
+
+
+class ReminderLedger:
+    """已送达提醒的持久记录
+
+    每送达一个提醒追加一条定长记录 (task_id, 发生时间, 提前的分钟数)，
+    重启后据此跳过已送达的提醒，保证每个提醒只送达一次。发生时间早于保留期的
+    记录在prune时丢弃并重写文件，内存和文件大小都只与保留期内的提醒数有关。
+
+    记录和清理只修改内存中的集合并立即返回，文件的追加、同步和重写由后台线程
+    完成，调用方（提醒定时器所在的线程）不等待磁盘。程序在记录写入磁盘前异常
+    退出时，这些提醒重启后可能再送达一次。
+    """
+
+    def __init__(self, path=None, retention_days: int = None):
+        self.path = path or AppConfig.REMINDER_LEDGER_FILE
+        self.retention = timedelta(
+            days=retention_days or AppConfig.REMINDER_LEDGER_DAYS
+        )
+        self._delivered = {}  # (task_id, 发生时间秒数) -> {提前的分钟数}
+        self._load()
+        self._file = open(self.path, "ab")  # 只在持有_io_lock时读写
+        self._pending = []  # 待追加的记录
+        self._rewrite = None  # 待重写的完整文件内容，写入后再追加_pending
+        self._closed = False
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._run, name="ledger-writer", daemon=True
+        )
+        self._thread.start()
+        self.prune()
+
+    def _load(self):
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+        # 写入中途退出时末尾可能残留不完整的记录，忽略它
+        usable = len(data) - len(data) % RECORD.size
+        for task_id, occurs_at, minutes in RECORD.iter_unpack(data[:usable]):
+            self._delivered.setdefault((task_id, occurs_at), set()).add(minutes)
+        if usable != len(data):
+            # 截掉不完整的部分，否则之后追加的记录都会错位
+            os.truncate(self.path, usable)
+            logger.warning("提醒记录末尾不完整，已忽略")
+        logger.debug(f"提醒记录已载入: {len(self)} 条")
+
+    def __len__(self):
+        return sum(len(minutes) for minutes in self._delivered.values())
+
+    def delivered(self, task_id, occurs_at: datetime) -> set:
+        """任务这次发生已送达的提醒时间点"""
+        return self._delivered.get((task_id, _seconds(occurs_at)), set())
+
+    def record(self, task_id, occurs_at: datetime, minutes: int):
+        """记录一个提醒已送达"""
+        self.record_many([(task_id, occurs_at, minutes)])
+
+    def record_many(self, reminders):
+        """记录一批提醒已送达，立即返回，由后台线程一次写入并同步磁盘
+
+        Args:
+            reminders: (task_id, 发生时间, 提前的分钟数) 的可迭代对象
+        """
+        records = []
+        for task_id, occurs_at, minutes in reminders:
+            key = (task_id, _seconds(occurs_at))
+            delivered = self._delivered.setdefault(key, set())
+            if minutes in delivered:
+                continue
+            delivered.add(minutes)
+            records.append(RECORD.pack(*key, minutes))
+        if not records:
+            return
+        with self._cond:
+            self._pending.extend(records)
+            self._cond.notify()
+
+    def prune(self, now: datetime = None):
+        """丢弃发生时间早于保留期的记录，由后台线程重写文件"""
+        cutoff = _seconds((now or datetime.now()) - self.retention)
+        expired = [key for key in self._delivered if key[1] < cutoff]
+        if not expired:
+            return
+        for key in expired:
+            del self._delivered[key]
+        content = b"".join(
+            RECORD.pack(task_id, occurs_at, minutes)
+            for (task_id, occurs_at), offsets in self._delivered.items()
+            for minutes in offsets
+        )
+        with self._cond:
+            # 重写的内容已包括尚未追加的记录
+            self._rewrite = content
+            self._pending = []
+            self._cond.notify()
+        logger.debug(f"提醒记录已清理: 丢弃 {len(expired)} 次发生的记录")
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed and self._rewrite is None and not self._pending:
+                    self._cond.wait()
+                if self._closed:
+                    return
+            self.flush()
+
+    def flush(self):
+        """立即将尚未写入的记录写入并同步磁盘"""
+        with self._io_lock:
+            with self._cond:
+                rewrite, pending = self._rewrite, self._pending
+                self._rewrite, self._pending = None, []
+            if rewrite is not None:
+                self._replace_file(rewrite)
+            if not pending:
+                return
+            try:
+                self._file.write(b"".join(pending))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except Exception as e:
+                logger.error(f"写入提醒记录失败: {e}", exc_info=True)
+
+    def _replace_file(self, content: bytes):
+        """用content原子地替换记录文件"""
+        self._file.close()
+        temp_file = f"{self.path}.tmp"
+        try:
+            with open(temp_file, "wb") as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.path)
+        except Exception as e:
+            logger.error(f"重写提醒记录失败: {e}", exc_info=True)
+        finally:
+            self._file = open(self.path, "ab")
+
+    def close(self):
+        """等待后台线程退出，写入剩余的记录后关闭文件"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        try:
+            self.flush()
+            self._file.close()
+        except Exception as e:
+            logger.error(f"关闭提醒记录失败: {e}", exc_info=True)
@@ -0,0 +1,368 @@
+import heapq
+import logging
+from datetime import datetime, timedelta
+from functools import lru_cache
+from .config import AppConfig
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+
+class HeapScheduler:
+    """基于最小堆的提醒调度队列
+
+    每个任务的下一次发生按每个提醒时间点（提前的分钟数）展开为一个具体的
+    触发时间放入堆中。重新调度或取消任务时旧条目不立即删除，而是通过版本号
+    在出堆时跳过（惰性删除），失效条目过多时整体重建堆。
+    """
+
+    def __init__(self):
+        self._heap = []  # (fire_at, task_id, version, occurs_at, minutes)
+        self._versions = {}  # task_id -> 当前有效的版本号
+        self._occurrences = {}  # task_id -> 已调度的发生时间
+        self._pending = {}  # task_id -> 堆中有效条目数
+        self._fired = {}  # task_id -> (发生时间, 已触发的提醒时间点)
+        self._version = 0
+        self._live = 0
+
+    def __len__(self):
+        """待触发的提醒数"""
+        return self._live
+
+    def schedule(self, task_id, occurs_at: datetime, offsets):
+        """为任务的一次发生安排提醒，替换该任务之前的安排
+
+        已经为这次发生触发过的提醒时间点不会重复安排；提醒时间已过但发生
+        尚未到来的时间点会在下一次pop_due时立即触发。
+        """
+        self._drop(task_id)
+        fired = self._fired.get(task_id)
+        if fired is not None and fired[0] != occurs_at:
+            del self._fired[task_id]
+            fired = None
+
+        self._version += 1
+        version = self._version
+        count = 0
+        for minutes in offsets:
+            if fired is not None and minutes in fired[1]:
+                continue
+            fire_at = occurs_at - timedelta(minutes=minutes)
+            heapq.heappush(self._heap, (fire_at, task_id, version, occurs_at, minutes))
+            count += 1
+        self._versions[task_id] = version
+        self._occurrences[task_id] = occurs_at
+        self._pending[task_id] = count
+        self._live += count
+
+    def cancel(self, task_id):
+        """取消任务的全部待触发提醒"""
+        self._drop(task_id)
+        self._fired.pop(task_id, None)
+
+    def _drop(self, task_id):
+        """使任务在堆中的条目失效"""
+        if self._versions.pop(task_id, None) is None:
+            return
+        del self._occurrences[task_id]
+        self._live -= self._pending.pop(task_id)
+        # 失效条目超过一半时重建堆，避免堆无限增长
+        if len(self._heap) > 64 and self._live * 2 < len(self._heap):
+            self._heap = [entry for entry in self._heap if self._is_live(entry)]
+            heapq.heapify(self._heap)
+
+    def _is_live(self, entry) -> bool:
+        return self._versions.get(entry[1]) == entry[2]
+
+    def clear(self):
+        self.__init__()
+
+    def scheduled(self, task_id) -> datetime:
+        """任务已调度的发生时间，未调度时返回None"""
+        return self._occurrences.get(task_id)
+
+    def next_fire_time(self) -> datetime:
+        """最早的待触发时间，没有待触发的提醒时返回None"""
+        heap = self._heap
+        while heap and not self._is_live(heap[0]):
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def pop_due(self, now: datetime) -> list:
+        """取出触发时间不晚于now的全部提醒
+
+        Returns:
+            按触发时间排序的 (task_id, occurs_at, minutes) 列表
+        """
+        heap = self._heap
+        due = []
+        while heap and heap[0][0] <= now:
+            fire_at, task_id, version, occurs_at, minutes = heapq.heappop(heap)
+            if self._versions.get(task_id) != version:
+                continue
+            self._live -= 1
+            self._pending[task_id] -= 1
+            fired = self._fired.setdefault(task_id, (occurs_at, set()))
+            fired[1].add(minutes)
+            due.append((task_id, occurs_at, minutes))
+        return due
+
+
+EPOCH = datetime(1970, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+MINUTES_PER_HOUR = 60
+MINUTES_PER_DAY = 24 * 60
+
+
+def _minute_of(dt: datetime) -> int:
+    """dt所在的分钟序号（自1970-01-01起）"""
+    # 按日期序号和时分计算，比timedelta的整除快
+    return (dt.toordinal() - EPOCH_ORDINAL) * MINUTES_PER_DAY + dt.hour * 60 + dt.minute
+
+
+def _minute_start(minute: int) -> datetime:
+    return EPOCH + timedelta(minutes=minute)
+
+
+@lru_cache(maxsize=None)
+def _offset(minutes: int) -> timedelta:
+    # 提醒时间点只有少数几种，复用timedelta对象
+    return timedelta(minutes=minutes)
+
+
+def _fire_time(entry) -> datetime:
+    return entry[3] - _offset(entry[4])
+
+
+class TimingWheelScheduler:
+    """分层时间轮实现的提醒调度队列，接口与HeapScheduler相同
+
+    三层时间轮的粒度分别为分钟、小时和天：当前小时内的提醒放在分钟轮，
+    当天的放在小时轮，更远的放在天轮。时间推进到新的一小时（一天）时，
+    把对应的小时（天）桶整体下放到更细的一层。插入是O(1)的追加，每个提醒
+    最多下放两次，推进时间的开销均摊为O(1)，与待触发的提醒总数无关。
+
+    桶以绝对的分钟/小时/天序号为键，不需要处理轮的回绕；空桶不占用空间，
+    推进时间时跳过整段的空层。取消与HeapScheduler一样通过版本号惰性删除，
+    失效条目在所在的桶被处理时丢弃。条目只保存触发分钟，精确到秒的触发时间
+    在到期时才计算，安排大量最终被修改或取消的提醒时不为每条构造timedelta。
+    """
+
+    def __init__(self, now: datetime = None):
+        # (触发分钟, task_id, version, occurs_at, minutes)
+        self._buckets = ({}, {}, {})  # 分钟/小时/天序号 -> [entry]
+        self._stored = 0  # 各层的条目总数（含失效条目）
+        self._day_keys = []  # 天轮中桶的序号（最小堆，惰性删除空桶）
+        self._versions = {}  # task_id -> 当前有效的版本号
+        self._occurrences = {}  # task_id -> 已调度的发生时间
+        self._pending = {}  # task_id -> 有效条目数
+        self._fired = {}  # task_id -> (发生时间, 已触发的提醒时间点)
+        self._version = 0
+        self._live = 0
+        self._set_cursor(_minute_of(now or datetime.now()))
+
+    def __len__(self):
+        """待触发的提醒数"""
+        return self._live
+
+    def _set_cursor(self, minute: int):
+        """当前分钟（尚未处理完）及其所在的小时、天"""
+        self._cursor = minute
+        self._hour = minute // MINUTES_PER_HOUR
+        self._day = minute // MINUTES_PER_DAY
+        # 分钟轮、小时轮覆盖的分钟上界（不含）
+        self._hour_end = (self._hour + 1) * MINUTES_PER_HOUR
+        self._day_end = (self._day + 1) * MINUTES_PER_DAY
+
+    def _place(self, entry):
+        """按触发时间与当前时间的距离把条目放入对应的层，不改变条目计数"""
+        minute = entry[0]
+        if minute < self._hour_end:
+            buckets, key = self._buckets[0], max(minute, self._cursor)
+        elif minute < self._day_end:
+            buckets, key = self._buckets[1], minute // MINUTES_PER_HOUR
+        else:
+            buckets, key = self._buckets[2], minute // MINUTES_PER_DAY
+            if key not in buckets:
+                heapq.heappush(self._day_keys, key)
+        bucket = buckets.get(key)
+        if bucket is None:
+            buckets[key] = [entry]
+        else:
+            bucket.append(entry)
+
+    def _is_live(self, entry) -> bool:
+        return self._versions.get(entry[1]) == entry[2]
+
+    def schedule(self, task_id, occurs_at: datetime, offsets):
+        """为任务的一次发生安排提醒，替换该任务之前的安排"""
+        self._drop(task_id)
+        fired = self._fired.get(task_id)
+        if fired is not None and fired[0] != occurs_at:
+            del self._fired[task_id]
+            fired = None
+
+        self._version += 1
+        version = self._version
+        base = _minute_of(occurs_at)
+        place = self._place
+        count = 0
+        for minutes in offsets:
+            if fired is not None and minutes in fired[1]:
+                continue
+            place((base - minutes, task_id, version, occurs_at, minutes))
+            count += 1
+        self._versions[task_id] = version
+        self._occurrences[task_id] = occurs_at
+        self._pending[task_id] = count
+        self._live += count
+        self._stored += count
+
+    def cancel(self, task_id):
+        """取消任务的全部待触发提醒"""
+        self._drop(task_id)
+        self._fired.pop(task_id, None)
+
+    def _drop(self, task_id):
+        """使任务的条目失效"""
+        if self._versions.pop(task_id, None) is None:
+            return
+        del self._occurrences[task_id]
+        self._live -= self._pending.pop(task_id)
+        # 失效条目超过一半时重新分桶，避免长期不到期的失效条目堆积
+        if self._stored > 64 and self._live * 2 < self._stored:
+            entries = [
+                entry
+                for buckets in self._buckets
+                for bucket in buckets.values()
+                for entry in bucket
+                if self._is_live(entry)
+            ]
+            for buckets in self._buckets:
+                buckets.clear()
+            self._day_keys = []
+            for entry in entries:
+                self._place(entry)
+            self._stored = len(entries)
+
+    def clear(self):
+        self.__init__()
+
+    def scheduled(self, task_id) -> datetime:
+        """任务已调度的发生时间，未调度时返回None"""
+        return self._occurrences.get(task_id)
+
+    def _cascade(self, level, key):
+        """把上一层的一个桶下放到更细的层，同时丢弃失效条目"""
+        bucket = self._buckets[level].pop(key, None)
+        if not bucket:
+            return
+        versions = self._versions
+        for entry in bucket:
+            if versions.get(entry[1]) == entry[2]:
+                self._place(entry)
+            else:
+                self._stored -= 1
+
+    def _advance_to(self, minute: int):
+        """把当前分钟推进到minute，进入新的一天或一小时时下放对应的桶"""
+        day, hour = self._day, self._hour
+        self._set_cursor(minute)
+        if self._day != day:
+            self._cascade(2, self._day)
+        if self._hour != hour:
+            self._cascade(1, self._hour)
+
+    def _next_stop(self, target: int) -> int:
+        """推进时间时下一个需要停下处理的分钟，跳过整段为空的层"""
+        if self._buckets[0]:
+            return self._cursor + 1
+        if self._buckets[1]:
+            return min(self._hour_end, target)
+        day = self._first_day()
+        if day is not None:
+            # 天轮中的桶都在以后的日子，直接跳到最近的非空天
+            return min(day * MINUTES_PER_DAY, target)
+        return target
+
+    def _first_day(self):
+        """天轮中最早的非空桶序号"""
+        day_keys = self._day_keys
+        while day_keys and day_keys[0] not in self._buckets[2]:
+            heapq.heappop(day_keys)
+        return day_keys[0] if day_keys else None
+
+    def _expire(self, now: datetime, due: list):
+        """取出当前分钟桶中已到时间的有效条目，以 (触发时间, entry) 加入due"""
+        bucket = self._buckets[0].pop(self._cursor, None)
+        if not bucket:
+            return
+        waiting = []
+        for entry in bucket:
+            if not self._is_live(entry):
+                continue
+            fire_at = _fire_time(entry)
+            if fire_at <= now:
+                due.append((fire_at, entry))
+            else:
+                waiting.append(entry)
+        self._stored -= len(bucket) - len(waiting)
+        if waiting:
+            self._buckets[0][self._cursor] = waiting
+
+    def pop_due(self, now: datetime) -> list:
+        """取出触发时间不晚于now的全部提醒
+
+        Returns:
+            按触发时间排序的 (task_id, occurs_at, minutes) 列表
+        """
+        target = _minute_of(now)
+        due = []
+        self._expire(now, due)
+        while self._cursor < target:
+            self._advance_to(self._next_stop(target))
+            self._expire(now, due)
+
+        # 与HeapScheduler一致，按触发时间排序，同时触发的按task_id排序
+        due.sort()
+        result = []
+        for _, (minute, task_id, version, occurs_at, minutes) in due:
+            self._live -= 1
+            self._pending[task_id] -= 1
+            fired = self._fired.setdefault(task_id, (occurs_at, set()))
+            fired[1].add(minutes)
+            result.append((task_id, occurs_at, minutes))
+        return result
+
+    def next_fire_time(self) -> datetime:
+        """最早的待触发时间，没有待触发的提醒时返回None
+
+        最早的提醒在小时轮或天轮中时返回对应桶的起始时间，届时桶被下放，
+        再由下一次调用给出准确时间。
+        """
+        if self._buckets[0]:
+            minutes = self._buckets[0]
+            for minute in range(self._cursor, self._hour_end):
+                bucket = minutes.get(minute)
+                if bucket:
+                    live = [_fire_time(entry) for entry in bucket if self._is_live(entry)]
+                    if live:
+                        return min(live)
+        if self._buckets[1]:
+            hours = self._buckets[1]
+            for hour in range(self._hour + 1, self._day_end // MINUTES_PER_HOUR):
+                if hour in hours:
+                    return _minute_start(hour * MINUTES_PER_HOUR)
+        day = self._first_day()
+        if day is not None:
+            return _minute_start(day * MINUTES_PER_DAY)
+        return None
+
+
+def create_scheduler():
+    """根据配置创建提醒调度队列"""
+    if AppConfig.REMINDER_SCHEDULER == "wheel":
+        return TimingWheelScheduler()
+    if AppConfig.REMINDER_SCHEDULER == "heap":
+        return HeapScheduler()
+    raise ValueError(f"未知的提醒调度方式: {AppConfig.REMINDER_SCHEDULER}")
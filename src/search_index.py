@@ -0,0 +1,108 @@
+import logging
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+
+def _grams(text: str) -> set:
+    """文本的检索单元：全部单字和相邻两字（二元组）"""
+    return set(text) | {text[i : i + 2] for i in range(len(text) - 1)}
+
+
+def _query_grams(term: str) -> set:
+    """查询词用到的检索单元，两字以上只用二元组即可覆盖全部单字"""
+    if len(term) == 1:
+        return {term}
+    return {term[i : i + 2] for i in range(len(term) - 1)}
+
+
+def _normalize(text: str) -> str:
+    return text.casefold()
+
+
+class SearchIndex:
+    """任务内容的倒排索引（单字 + 二元组）
+
+    中文没有词边界，按相邻两字建立倒排表。查询时先对各二元组的倒排表求交集
+    得到候选，再用子串匹配确认，因此输入到一半的词（前缀）也能命中。
+    以空白分隔的多个词按AND处理。
+    """
+
+    def __init__(self):
+        self._postings = {}  # gram -> {task_id}
+        self._contents = {}  # task_id -> 规范化后的内容
+
+    def __len__(self):
+        return len(self._contents)
+
+    def rebuild(self, items):
+        """由 (task_id, content) 序列整体重建索引"""
+        self._postings = {}
+        self._contents = {}
+        for task_id, content in items:
+            self.add(task_id, content)
+
+    def add(self, task_id, content: str):
+        """加入或更新任务内容"""
+        if task_id in self._contents:
+            self.remove(task_id)
+        text = _normalize(content or "")
+        self._contents[task_id] = text
+        postings = self._postings
+        for gram in _grams(text):
+            bucket = postings.get(gram)
+            if bucket is None:
+                postings[gram] = {task_id}
+            else:
+                bucket.add(task_id)
+
+    def remove(self, task_id):
+        """将任务移出索引"""
+        text = self._contents.pop(task_id, None)
+        if text is None:
+            return
+        for gram in _grams(text):
+            bucket = self._postings.get(gram)
+            if bucket is None:
+                continue
+            bucket.discard(task_id)
+            if not bucket:
+                del self._postings[gram]
+
+    def clear(self):
+        self._postings = {}
+        self._contents = {}
+
+    def search(self, query: str) -> set:
+        """返回内容包含query中全部词的任务id集合，空查询返回空集合"""
+        terms = _normalize(query).split()
+        if not terms:
+            return set()
+
+        grams = set()
+        for term in terms:
+            grams |= _query_grams(term)
+        postings = []
+        for gram in grams:
+            bucket = self._postings.get(gram)
+            if not bucket:
+                return set()
+            postings.append(bucket)
+
+        # 从最短的倒排表开始求交集，候选集合尽快缩小
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for bucket in postings[1:]:
+            candidates &= bucket
+            if not candidates:
+                return candidates
+
+        # 两字以内的词，倒排表命中即是子串命中，无需再确认
+        if all(len(term) <= 2 for term in terms):
+            return candidates
+        contents = self._contents
+        return {
+            task_id
+            for task_id in candidates
+            if all(term in contents[task_id] for term in terms)
+        }
@@ -0,0 +1,249 @@
+"""任务数据的二进制快照
+
+快照按列存储全部任务，启动时通过mmap直接读取，避免逐行查询存储后端。
+文件结构（小端序）:
+
+    头部    magic(6s) version(H) count(I) cycle_count(I) offsets_count(I)
+            content_size(Q) cycle_size(Q) stamp_len(H) stamp
+    列数据  id(q*n) time(q*n) last_done(q*n) type(b*n) reminded(b*n) cycle(i*n)
+            reminder_offsets(i*n) content_offsets(I*(n+1))
+            cycle_offsets(I*(cycle_count+1)) offsets_offsets(I*(offsets_count+1))
+    字符串  content_blob  cycle_blob  offsets_blob（UTF-8）
+
+周期信息和提醒时间点的取值种类很少，各自存为去重后的字符串表，列中保存表中的序号，
+-1表示没有。
+
+stamp记录写快照时存储后端的状态，与当前存储不一致时快照视为过期。
+"""
+
+import gc
+import mmap
+import os
+import struct
+import sys
+import logging
+from array import array
+from datetime import datetime
+import numpy as np
+from .recurrence import compile_rule, is_self_contained
+from .task_store import (
+    TYPE_CODES,
+    TYPE_NAMES,
+    TaskStore,
+    format_cycle_info,
+    format_reminder_offsets,
+    parse_cycle_info,
+    parse_reminder_offsets,
+)
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+MAGIC = b"SMSNAP"
+VERSION = 3
+HEADER = struct.Struct("<6sHIIIQQH")
+EPOCH = datetime(1970, 1, 1)
+NO_TIME = -(2**63)
+
+
+def _column(values, typecode) -> bytes:
+    """按小端序打包一列数值"""
+    column = array(typecode, values)
+    if column.itemsize > 1 and sys.byteorder == "big":
+        column.byteswap()
+    return column.tobytes()
+
+
+def _seconds(dt) -> int:
+    return NO_TIME if dt is None else int((dt - EPOCH).total_seconds())
+
+
+def _offsets(strings) -> tuple:
+    """拼接字符串，返回 (字符偏移量列表, 拼接后的字符串)"""
+    offsets = [0]
+    for text in strings:
+        offsets.append(offsets[-1] + len(text))
+    return offsets, "".join(strings)
+
+
+def _string_table(values, to_string) -> tuple:
+    """将值转换为字符串并去重，返回 (字符串表, 每个值在表中的序号列表)
+
+    周期信息等在任务之间共享，同一个对象只转换一次。转换结果为None的序号为-1。
+    """
+    table = {}
+    converted = {}  # id(值) -> 序号，值在写快照期间一直被任务引用，id不会重复
+    refs = []
+    for value in values:
+        ref = converted.get(id(value))
+        if ref is None:
+            text = to_string(value)
+            ref = -1 if text is None else table.setdefault(text, len(table))
+            converted[id(value)] = ref
+        refs.append(ref)
+    return list(table), refs
+
+
+def write_snapshot(path, tasks: TaskStore, stamp: str):
+    """将TaskStore中的任务写入快照文件（先写临时文件再替换）"""
+    fields = (
+        "id",
+        "content",
+        "datetime",
+        "last_done",
+        "rule",
+        "reminded",
+        "cycle",
+        "reminder_offsets",
+    )
+    columns = list(zip(*tasks.select(*fields))) or [()] * len(fields)
+    ids, contents, times, last_done, rules, reminded, cycles, offsets = columns
+    cycle_table, cycle_refs = _string_table(cycles, format_cycle_info)
+    offsets_table, offsets_refs = _string_table(offsets, format_reminder_offsets)
+
+    content_offsets, content_blob = _offsets(contents)
+    cycle_offsets, cycle_blob = _offsets(cycle_table)
+    offsets_offsets, offsets_blob = _offsets(offsets_table)
+    stamp_bytes = stamp.encode("utf-8")
+    content_bytes = content_blob.encode("utf-8")
+    cycle_bytes = cycle_blob.encode("utf-8")
+
+    parts = [
+        HEADER.pack(
+            MAGIC,
+            VERSION,
+            len(ids),
+            len(cycle_table),
+            len(offsets_table),
+            len(content_bytes),
+            len(cycle_bytes),
+            len(stamp_bytes),
+        ),
+        stamp_bytes,
+        _column(ids, "q"),
+        _column(map(_seconds, times), "q"),
+        _column(map(_seconds, last_done), "q"),
+        _column((0 if rule is None else TYPE_CODES[rule.freq] for rule in rules), "b"),
+        _column(reminded, "b"),
+        _column(cycle_refs, "i"),
+        _column(offsets_refs, "i"),
+        _column(content_offsets, "I"),
+        _column(cycle_offsets, "I"),
+        _column(offsets_offsets, "I"),
+        content_bytes,
+        cycle_bytes,
+        offsets_blob.encode("utf-8"),
+    ]
+
+    temp_file = f"{path}.tmp"
+    with open(temp_file, "wb") as f:
+        f.write(b"".join(parts))
+    os.replace(temp_file, path)
+    logger.debug(f"快照已写入: {path}, {len(ids)} 个任务")
+
+
+def read_snapshot(path, stamp: str) -> TaskStore:
+    """读取快照为TaskStore，快照不存在、损坏或与stamp不一致时返回None"""
+    # 批量创建大量对象时暂停循环垃圾回收，避免反复触发无效的回收
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return _read(mm, stamp)
+    except (FileNotFoundError, ValueError):
+        return None
+    except Exception as e:
+        logger.warning(f"读取快照失败，将从存储后端载入: {e}")
+        return None
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _read(mm, stamp: str):
+    (
+        magic,
+        version,
+        count,
+        cycle_count,
+        offsets_count,
+        content_size,
+        cycle_size,
+        stamp_len,
+    ) = HEADER.unpack_from(mm, 0)
+    if magic != MAGIC or version != VERSION:
+        logger.info("快照格式不匹配，忽略快照")
+        return None
+    pos = HEADER.size
+    if bytes(mm[pos : pos + stamp_len]).decode("utf-8") != stamp:
+        logger.info("快照已过期，忽略快照")
+        return None
+    pos += stamp_len
+
+    def take(dtype, n):
+        # 复制出来，不保留对mmap的引用，读取出错时mmap仍能正常关闭
+        nonlocal pos
+        column = np.frombuffer(mm, dtype=dtype, count=n, offset=pos).copy()
+        pos += column.nbytes
+        return column
+
+    # 数值列整列复制进TaskStore，不为每个任务创建Task和datetime对象
+    ids = take("<i8", count)
+    # NO_TIME即datetime64的NaT
+    times = take("<i8", count).view("<M8[s]")
+    last_done = take("<i8", count).view("<M8[s]")
+    type_codes = take("i1", count).tolist()
+    reminded = take("i1", count).astype(bool)
+    cycle_refs = take("<i4", count).tolist()
+    offsets_refs = take("<i4", count).tolist()
+    content_offsets = take("<u4", count + 1).tolist()
+    cycle_offsets = take("<u4", cycle_count + 1).tolist()
+    offsets_offsets = take("<u4", offsets_count + 1).tolist()
+    content_blob = mm[pos : pos + content_size].decode("utf-8")
+    pos += content_size
+    cycle_blob = mm[pos : pos + cycle_size].decode("utf-8")
+    offsets_blob = mm[pos + cycle_size :].decode("utf-8")
+
+    contents = [
+        content_blob[start:end]
+        for start, end in zip(content_offsets, content_offsets[1:])
+    ]
+    cycle_table = [
+        parse_cycle_info(cycle_blob[start:end])
+        for start, end in zip(cycle_offsets, cycle_offsets[1:])
+    ]
+    cycle_table.append(None)  # 引用-1表示无周期信息
+    offsets_table = [
+        parse_reminder_offsets(offsets_blob[start:end])
+        for start, end in zip(offsets_offsets, offsets_offsets[1:])
+    ]
+    offsets_table.append(None)
+    cycles = [cycle_table[ref] for ref in cycle_refs]
+
+    # 周期信息完整时，相同类型和周期信息的任务直接复用已编译的规则；
+    # 不完整时规则取决于任务时间，逐个编译
+    rules = [None] * count
+    compiled = {}
+    for row, (type_code, ref) in enumerate(zip(type_codes, cycle_refs)):
+        if not type_code:
+            continue
+        key = (type_code, ref)
+        rule = compiled.get(key)
+        if rule is None:
+            task_type = TYPE_NAMES.get(type_code, "ONCE")
+            rule = compile_rule(task_type, cycles[row], times[row].item())
+            if is_self_contained(task_type, cycles[row]):
+                compiled[key] = rule
+        rules[row] = rule
+
+    return TaskStore.from_columns(
+        ids,
+        contents,
+        times,
+        reminded,
+        cycles,
+        rules,
+        last_done,
+        [offsets_table[ref] for ref in offsets_refs],
+    )
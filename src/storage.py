@@ -0,0 +1,633 @@
+import os
+import sqlite3
+import logging
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from .config import AppConfig
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 任务表的列（不含主键id）
+TASK_COLUMNS = [
+    "content",
+    "datetime",
+    "type",
+    "cycle_info",
+    "reminded",
+    "last_done",
+    "reminder_offsets",
+]
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _to_db_datetime(dt) -> str:
+    """datetime转为存储用的字符串"""
+    if dt is None:
+        return None
+    if isinstance(dt, str):
+        dt = datetime.fromisoformat(dt)
+    elif dt != dt:  # Excel中的空单元格读出为NaN或NaT
+        return None
+    return dt.strftime(DATETIME_FORMAT)
+
+
+def _from_db_datetime(value) -> datetime:
+    """存储中的字符串转为datetime"""
+    if value is None:
+        return None
+    # fromisoformat比strptime快一个数量级，格式与DATETIME_FORMAT一致
+    return datetime.fromisoformat(value)
+
+
+class StorageBackend:
+    """存储后端接口，DataManager通过它读写任务数据
+
+    每条任务以字典表示，键为 id 和 TASK_COLUMNS 中的列。
+    """
+
+    def load(self) -> list:
+        """读取全部任务"""
+        raise NotImplementedError
+
+    def insert(self, task: dict) -> int:
+        """插入一条任务，返回新任务的id"""
+        raise NotImplementedError
+
+    def insert_many(self, tasks: list) -> list:
+        """批量插入任务，返回新任务的id列表"""
+        return [self.insert(task) for task in tasks]
+
+    def update(self, task_id: int, fields: dict):
+        """更新一条任务的部分字段"""
+        raise NotImplementedError
+
+    def delete(self, task_id: int):
+        """删除一条任务"""
+        raise NotImplementedError
+
+    def clear(self):
+        """删除全部任务"""
+        raise NotImplementedError
+
+    def max_id(self) -> int:
+        """返回曾分配过的最大任务id，用于在写入前预分配新id"""
+        raise NotImplementedError
+
+    def apply(self, cleared: bool, changes: dict, meta: dict):
+        """批量应用一组合并后的修改
+
+        Args:
+            cleared: 是否先删除全部任务
+            changes: {task_id: (op, payload)}，op为insert/update/delete
+            meta: 需要写入的元数据
+        """
+        if cleared:
+            self.clear()
+        for task_id, (op, payload) in changes.items():
+            if op == "insert":
+                self.insert({**payload, "id": task_id})
+            elif op == "update":
+                self.update(task_id, payload)
+            elif op == "delete":
+                self.delete(task_id)
+        for key, value in meta.items():
+            self.set_meta(key, value)
+
+    def stamp(self) -> str:
+        """返回标识当前存储内容版本的字符串，内容变化后随之变化"""
+        raise NotImplementedError
+
+    def get_meta(self, key: str, default=None):
+        """读取元数据"""
+        return default
+
+    def set_meta(self, key: str, value: str):
+        """写入元数据"""
+
+    def flush(self):
+        """将缓冲中的数据写入磁盘"""
+
+    def close(self):
+        """关闭存储"""
+
+
+class SQLiteStorage(StorageBackend):
+    """SQLite存储后端（WAL模式），单条增删改只涉及一行的I/O"""
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self.conn = sqlite3.connect(str(db_file), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS tasks (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    content TEXT NOT NULL,
+                    datetime TEXT,
+                    type TEXT NOT NULL DEFAULT 'ONCE',
+                    cycle_info TEXT,
+                    reminded INTEGER NOT NULL DEFAULT 0,
+                    last_done TEXT,
+                    reminder_offsets TEXT
+                )
+                """
+            )
+            self._add_missing_columns()
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_tasks_datetime ON tasks(datetime)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+            self.conn.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', '0')"
+            )
+        logger.debug(f"SQLite存储已打开: {db_file}")
+
+    def _add_missing_columns(self):
+        """为旧版数据库补充新增的列"""
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(tasks)")}
+        for column in ("last_done", "reminder_offsets"):
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE tasks ADD COLUMN {column} TEXT")
+
+    @staticmethod
+    def _to_row(task: dict) -> dict:
+        row = {}
+        for col, value in task.items():
+            if col in ("datetime", "last_done"):
+                value = _to_db_datetime(value)
+            elif col == "reminded":
+                value = int(bool(value))
+            row[col] = value
+        return row
+
+    def load(self) -> list:
+        cursor = self.conn.execute(
+            f"SELECT id, {', '.join(TASK_COLUMNS)} FROM tasks ORDER BY id"
+        )
+        return [
+            {
+                "id": task_id,
+                "content": content,
+                "datetime": _from_db_datetime(dt),
+                "type": task_type,
+                "cycle_info": cycle_info,
+                "reminded": bool(reminded),
+                "last_done": _from_db_datetime(last_done),
+                "reminder_offsets": reminder_offsets,
+            }
+            for (
+                task_id,
+                content,
+                dt,
+                task_type,
+                cycle_info,
+                reminded,
+                last_done,
+                reminder_offsets,
+            ) in cursor
+        ]
+
+    def _insert(self, task: dict) -> int:
+        row = self._to_row({col: task.get(col) for col in TASK_COLUMNS})
+        row["id"] = task.get("id")
+        cursor = self.conn.execute(
+            f"INSERT INTO tasks (id, {', '.join(TASK_COLUMNS)})"
+            f" VALUES (:id, {', '.join(':' + col for col in TASK_COLUMNS)})",
+            row,
+        )
+        return cursor.lastrowid
+
+    def _update(self, task_id: int, fields: dict):
+        row = self._to_row({k: v for k, v in fields.items() if k in TASK_COLUMNS})
+        if not row:
+            return
+        assignments = ", ".join(f"{col} = :{col}" for col in row)
+        row["id"] = task_id
+        self.conn.execute(f"UPDATE tasks SET {assignments} WHERE id = :id", row)
+
+    def _bump_generation(self):
+        """在当前事务中递增数据版本号"""
+        self.conn.execute(
+            "UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'generation'"
+        )
+
+    def insert(self, task: dict) -> int:
+        with self.conn:
+            self._bump_generation()
+            return self._insert(task)
+
+    def insert_many(self, tasks: list) -> list:
+        # 所有行在同一个事务中写入，只提交一次
+        with self.conn:
+            self._bump_generation()
+            return [self._insert(task) for task in tasks]
+
+    def update(self, task_id: int, fields: dict):
+        with self.conn:
+            self._bump_generation()
+            self._update(task_id, fields)
+
+    def delete(self, task_id: int):
+        with self.conn:
+            self._bump_generation()
+            self.conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+
+    def clear(self):
+        with self.conn:
+            self._bump_generation()
+            self.conn.execute("DELETE FROM tasks")
+
+    def stamp(self) -> str:
+        return f"sqlite:{self.get_meta('generation')}"
+
+    def max_id(self) -> int:
+        # AUTOINCREMENT的计数器在删除后也不会回退，保证id不被复用；
+        # 预分配后未写入就被删除的id记录在元数据last_id中
+        row = self.conn.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'tasks'"
+        ).fetchone()
+        return max(row[0] if row else 0, int(self.get_meta("last_id", 0)))
+
+    def apply(self, cleared: bool, changes: dict, meta: dict):
+        # 整批修改在同一个事务中提交，要么全部生效，要么全部回滚
+        with self.conn:
+            self._bump_generation()
+            if cleared:
+                self.conn.execute("DELETE FROM tasks")
+            for task_id, (op, payload) in changes.items():
+                if op == "insert":
+                    self._insert({**payload, "id": task_id})
+                elif op == "update":
+                    self._update(task_id, payload)
+                elif op == "delete":
+                    self.conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                list(meta.items()),
+            )
+
+    def get_meta(self, key: str, default=None):
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value: str):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+            )
+
+    def close(self):
+        try:
+            self.conn.close()
+            logger.debug("SQLite存储已关闭")
+        except Exception as e:
+            logger.error(f"关闭SQLite存储失败: {e}", exc_info=True)
+
+
+class ExcelStorage(StorageBackend):
+    """Excel存储后端（旧格式），每次修改都会重写整个文件
+
+    任务保存在第一个工作表，元数据（包括曾分配过的最大id）保存在meta工作表。
+    pandas只在使用Excel存储时载入，不拖慢默认的SQLite存储和无界面提醒服务的启动。
+    """
+
+    META_SHEET = "meta"
+
+    def __init__(self, excel_file):
+        import pandas as pd
+
+        self.excel_file = excel_file
+        try:
+            sheets = pd.read_excel(
+                self.excel_file,
+                sheet_name=None,
+                dtype={"key": str, "value": str, "reminder_offsets": str},
+            )
+        except FileNotFoundError:
+            sheets = {}
+        meta_df = sheets.pop(self.META_SHEET, None)
+        self.meta = (
+            {}
+            if meta_df is None
+            else dict(
+                zip(meta_df["key"].astype(str), meta_df["value"].fillna("").astype(str))
+            )
+        )
+        self.df = (
+            next(iter(sheets.values()))
+            if sheets
+            else pd.DataFrame(columns=TASK_COLUMNS)
+        )
+        for col in TASK_COLUMNS:
+            if col not in self.df.columns:
+                self.df[col] = None
+        for col in ("datetime", "last_done"):
+            self.df[col] = pd.to_datetime(self.df[col])
+        if "id" not in self.df.columns:
+            self.df.insert(0, "id", range(1, len(self.df) + 1))
+        self.df = self.df.set_index("id")
+
+    def load(self) -> list:
+        import pandas as pd
+
+        tasks = []
+        for task_id, row in self.df.iterrows():
+            tasks.append(
+                {
+                    "id": int(task_id),
+                    "content": row["content"],
+                    "datetime": (
+                        None if pd.isna(row["datetime"]) else row["datetime"].to_pydatetime()
+                    ),
+                    "type": row["type"] if pd.notna(row["type"]) else "ONCE",
+                    "cycle_info": row["cycle_info"] if pd.notna(row["cycle_info"]) else None,
+                    "reminded": bool(row["reminded"]) if pd.notna(row["reminded"]) else False,
+                    "last_done": (
+                        None if pd.isna(row["last_done"]) else row["last_done"].to_pydatetime()
+                    ),
+                    "reminder_offsets": (
+                        row["reminder_offsets"] if pd.notna(row["reminder_offsets"]) else None
+                    ),
+                }
+            )
+        return tasks
+
+    def _write(self):
+        import pandas as pd
+
+        # 先写临时文件再原子替换，避免写入中途退出损坏数据文件
+        excel_file = Path(self.excel_file)
+        temp_file = excel_file.with_name(f"{excel_file.stem}.tmp{excel_file.suffix}")
+        with pd.ExcelWriter(temp_file) as writer:
+            self.df.to_excel(writer, sheet_name="tasks", index=True, index_label="id")
+            pd.DataFrame(
+                list(self.meta.items()), columns=["key", "value"]
+            ).to_excel(writer, sheet_name=self.META_SHEET, index=False)
+        os.replace(temp_file, self.excel_file)
+
+    def max_id(self) -> int:
+        # 记录曾分配过的最大id，删除末尾的任务后id也不会被复用
+        last_id = int(self.meta.get("last_id", 0))
+        return max(last_id, int(self.df.index.max()) if len(self.df) else 0)
+
+    def get_meta(self, key: str, default=None):
+        return self.meta.get(key, default)
+
+    def set_meta(self, key: str, value: str, write: bool = True):
+        self.meta[key] = value
+        if write:
+            self._write()
+
+    def stamp(self) -> str:
+        try:
+            stat = os.stat(self.excel_file)
+        except FileNotFoundError:
+            return "excel:missing"
+        return f"excel:{stat.st_mtime_ns}:{stat.st_size}"
+
+    def insert(self, task: dict) -> int:
+        return self.insert_many([task])[0]
+
+    def insert_many(self, tasks: list, write: bool = True) -> list:
+        import pandas as pd
+
+        next_id = self.max_id() + 1
+        task_ids = []
+        for task in tasks:
+            task_id = task.get("id") or next_id
+            next_id = max(next_id, task_id + 1)
+            task_ids.append(task_id)
+        new_df = pd.DataFrame(
+            [[task.get(col) for col in TASK_COLUMNS] for task in tasks],
+            columns=TASK_COLUMNS,
+            index=pd.Index(task_ids, name="id"),
+        )
+        self.df = pd.concat([self.df, new_df]) if len(self.df) else new_df
+        self.meta["last_id"] = str(max(self.max_id(), *task_ids))
+        if write:
+            self._write()
+        return task_ids
+
+    def update(self, task_id: int, fields: dict, write: bool = True):
+        for col, value in fields.items():
+            if col in TASK_COLUMNS:
+                self.df.at[task_id, col] = value
+        if write:
+            self._write()
+
+    def _remember_max_id(self):
+        """删除任务前记下曾分配过的最大id，删掉的是id最大的任务时也不会复用"""
+        self.meta["last_id"] = str(self.max_id())
+
+    def delete(self, task_id: int, write: bool = True):
+        self._remember_max_id()
+        self.df = self.df.drop(task_id)
+        if write:
+            self._write()
+
+    def clear(self, write: bool = True):
+        self._remember_max_id()
+        self.df = self.df.iloc[0:0]
+        if write:
+            self._write()
+
+    def apply(self, cleared: bool, changes: dict, meta: dict):
+        # 所有修改先作用于内存，最后只写一次文件
+        if cleared:
+            self.clear(write=False)
+        inserts = []
+        for task_id, (op, payload) in changes.items():
+            if op == "insert":
+                inserts.append({**payload, "id": task_id})
+            elif op == "update":
+                self.update(task_id, payload, write=False)
+            elif op == "delete":
+                self.delete(task_id, write=False)
+        if inserts:
+            self.insert_many(inserts, write=False)
+        self.meta.update(meta)
+        self._write()
+
+
+class WriteBehindStorage(StorageBackend):
+    """后台写入的存储包装器
+
+    修改立即返回，由后台线程在WRITE_BEHIND_DELAY秒的窗口内合并后
+    一次性写入内部存储后端。新任务的id在内存中预先分配。
+    """
+
+    def __init__(self, backend: StorageBackend, delay: float):
+        self.backend = backend
+        self.delay = delay
+        self._next_id = backend.max_id() + 1
+        self._cleared = False
+        self._changes = {}
+        self._meta = {}
+        self._first_change_at = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._run, name="storage-writer", daemon=True
+        )
+        self._thread.start()
+
+    @staticmethod
+    def _merge(changes: dict, task_id: int, op: str, payload):
+        """将一次修改合并进待写入的修改集合"""
+        prev = changes.get(task_id)
+        if op == "insert":
+            changes[task_id] = ("insert", dict(payload))
+        elif op == "update":
+            if prev is None:
+                changes[task_id] = ("update", dict(payload))
+            elif prev[0] != "delete":
+                prev[1].update(payload)
+        elif op == "delete":
+            if prev is not None and prev[0] == "insert":
+                # 尚未写入就被删除的任务无需落盘
+                del changes[task_id]
+            else:
+                changes[task_id] = ("delete", None)
+
+    def _enqueue(self, task_id, op, payload=None):
+        with self._cond:
+            self._merge(self._changes, task_id, op, payload)
+            self._notify()
+
+    def _notify(self):
+        if self._first_change_at is None:
+            self._first_change_at = time.monotonic()
+        self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed and self._first_change_at is None:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                # 等待合并窗口结束，窗口内的修改一起写入
+                remaining = self._first_change_at + self.delay - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+            try:
+                self.flush()
+            except Exception:
+                # 失败的修改已放回队列，下一个窗口重试
+                pass
+
+    def load(self) -> list:
+        self.flush()
+        return self.backend.load()
+
+    def insert(self, task: dict) -> int:
+        return self.insert_many([task])[0]
+
+    def insert_many(self, tasks: list) -> list:
+        with self._cond:
+            task_ids = []
+            for task in tasks:
+                task_id = self._next_id
+                self._next_id += 1
+                self._merge(self._changes, task_id, "insert", task)
+                task_ids.append(task_id)
+            # 插入可能在写入前被删除而合并掉，单独记录已分配的最大id
+            self._meta["last_id"] = str(self._next_id - 1)
+            self._notify()
+        return task_ids
+
+    def update(self, task_id: int, fields: dict):
+        self._enqueue(task_id, "update", fields)
+
+    def delete(self, task_id: int):
+        self._enqueue(task_id, "delete")
+
+    def clear(self):
+        with self._cond:
+            self._cleared = True
+            self._changes = {}
+            self._notify()
+
+    def max_id(self) -> int:
+        return self._next_id - 1
+
+    def stamp(self) -> str:
+        self.flush()
+        return self.backend.stamp()
+
+    def get_meta(self, key: str, default=None):
+        with self._cond:
+            if key in self._meta:
+                return self._meta[key]
+        return self.backend.get_meta(key, default)
+
+    def set_meta(self, key: str, value: str):
+        with self._cond:
+            self._meta[key] = value
+            self._notify()
+
+    def flush(self):
+        """立即将待写入的修改写入内部存储后端"""
+        with self._io_lock:
+            with self._cond:
+                cleared, changes, meta = self._cleared, self._changes, self._meta
+                self._cleared, self._changes, self._meta = False, {}, {}
+                self._first_change_at = None
+            if not (cleared or changes or meta):
+                return
+            try:
+                self.backend.apply(cleared, changes, meta)
+                logger.debug(f"后台写入完成: {len(changes)} 个任务变更")
+            except Exception as e:
+                logger.error(f"后台写入失败，将稍后重试: {e}", exc_info=True)
+                self._requeue(cleared, changes, meta)
+                raise
+
+    def _requeue(self, cleared, changes, meta):
+        """写入失败时把修改放回队列，较新的修改覆盖在其上"""
+        with self._cond:
+            if not self._cleared:
+                newer = self._changes
+                self._cleared = cleared
+                self._changes = changes
+                for task_id, (op, payload) in newer.items():
+                    self._merge(self._changes, task_id, op, payload)
+            self._meta = {**meta, **self._meta}
+            self._notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        try:
+            self.flush()
+        finally:
+            self.backend.close()
+
+
+def create_storage() -> StorageBackend:
+    """根据配置创建存储后端"""
+    backend = AppConfig.STORAGE_BACKEND
+    if backend == "sqlite":
+        storage = SQLiteStorage(AppConfig.DB_FILE)
+    elif backend == "excel":
+        storage = ExcelStorage(AppConfig.DATA_FILE)
+    else:
+        raise ValueError(f"未知的存储后端: {backend}")
+
+    if AppConfig.WRITE_BEHIND:
+        storage = WriteBehindStorage(storage, AppConfig.WRITE_BEHIND_DELAY)
+    return storage
@@ -0,0 +1,186 @@
+import calendar
+import itertools
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime, time
+from .recurrence import DAILY, MONTHLY, WEEKLY
+
+
+class DueIndex:
+    """按触发时间排序的任务索引
+
+    以有序列表保存 (fire_time, task_id)，查询某个时间窗口内触发的任务
+    只需两次二分查找，复杂度为 O(log n + k)。
+    """
+
+    def __init__(self):
+        self._entries = []  # 按 (fire_time, task_id) 排序
+        self._fire_times = {}  # task_id -> fire_time
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, task_id):
+        return task_id in self._fire_times
+
+    def rebuild(self, items):
+        """由 (task_id, fire_time) 序列整体重建索引，只排序一次"""
+        self._fire_times = {
+            task_id: fire_time for task_id, fire_time in items if fire_time is not None
+        }
+        self._entries = sorted(
+            (fire_time, task_id) for task_id, fire_time in self._fire_times.items()
+        )
+
+    def set(self, task_id, fire_time: datetime):
+        """设置任务的触发时间，fire_time为None时移出索引"""
+        self.remove(task_id)
+        if fire_time is None:
+            return
+        insort(self._entries, (fire_time, task_id))
+        self._fire_times[task_id] = fire_time
+
+    def remove(self, task_id):
+        """将任务移出索引"""
+        fire_time = self._fire_times.pop(task_id, None)
+        if fire_time is None:
+            return
+        pos = bisect_left(self._entries, (fire_time, task_id))
+        del self._entries[pos]
+
+    def get(self, task_id):
+        """返回任务的触发时间"""
+        return self._fire_times.get(task_id)
+
+    def range(self, start: datetime, end: datetime) -> list:
+        """返回触发时间在 (start, end] 内的任务id，按触发时间排序"""
+        lo = bisect_right(self._entries, (start, float("inf")))
+        hi = bisect_right(self._entries, (end, float("inf")))
+        return [task_id for _, task_id in self._entries[lo:hi]]
+
+    def after(self, start: datetime):
+        """按触发时间顺序逐个产生触发时间晚于start的 (fire_time, task_id)
+
+        迭代期间不应修改索引。
+        """
+        lo = bisect_right(self._entries, (start, float("inf")))
+        return itertools.islice(self._entries, lo, None)
+
+    def clear(self):
+        self._entries = []
+        self._fire_times = {}
+
+
+def _occurrence_on(rule, anchor: datetime, day: date):
+    """周期规则在day这一天的发生时间，不发生或早于anchor时返回None"""
+    if rule.freq == WEEKLY and day.weekday() != rule.weekday:
+        return None
+    if rule.freq == MONTHLY:
+        last_day = calendar.monthrange(day.year, day.month)[1]
+        if min(rule.day, last_day) != day.day:
+            return None
+    occurs_at = datetime.combine(day, time(rule.hour, rule.minute))
+    if anchor is not None and occurs_at < anchor:
+        return None
+    return occurs_at
+
+
+class DayIndex:
+    """按日期分桶的任务索引，并缓存每天的任务视图
+
+    一次性任务按日期分桶；周期任务按规则分桶（DAILY一个桶，WEEKLY按星期，
+    MONTHLY按几号），查询某天只需检查当天可能发生的任务，复杂度为 O(当天任务数)。
+    每天的查询结果会被缓存，修改只使涉及的日期的缓存失效。
+    """
+
+    def __init__(self):
+        self._once = {}  # date -> {task_id}
+        self._rule_buckets = {}  # (freq, weekday/day) -> {task_id}
+        self._entries = {}  # task_id -> (datetime, rule)
+        self._views = {}  # date -> [(occurs_at, task_id)]
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _bucket_key(rule):
+        if rule.freq == WEEKLY:
+            return (WEEKLY, rule.weekday)
+        if rule.freq == MONTHLY:
+            return (MONTHLY, rule.day)
+        return (DAILY, None)
+
+    def rebuild(self, items):
+        """由 (task_id, datetime, rule) 序列整体重建索引"""
+        self.clear()
+        for task_id, dt, rule in items:
+            self._add(task_id, dt, rule)
+
+    def _add(self, task_id, dt: datetime, rule):
+        if rule is not None:
+            self._rule_buckets.setdefault(self._bucket_key(rule), set()).add(task_id)
+        elif dt is not None:
+            self._once.setdefault(dt.date(), set()).add(task_id)
+        else:
+            return
+        self._entries[task_id] = (dt, rule)
+
+    def set(self, task_id, dt: datetime, rule=None):
+        """设置任务的时间和周期规则（一次性任务rule为None）"""
+        self.remove(task_id)
+        self._add(task_id, dt, rule)
+        self._invalidate(dt, rule)
+
+    def remove(self, task_id):
+        """将任务移出索引"""
+        entry = self._entries.pop(task_id, None)
+        if entry is None:
+            return
+        dt, rule = entry
+        if rule is not None:
+            self._rule_buckets[self._bucket_key(rule)].discard(task_id)
+        else:
+            self._once[dt.date()].discard(task_id)
+        self._invalidate(dt, rule)
+
+    def _invalidate(self, dt: datetime, rule):
+        """使任务发生的日期的缓存视图失效"""
+        if rule is None:
+            if dt is not None:
+                self._views.pop(dt.date(), None)
+            return
+        for day in [day for day in self._views if _occurrence_on(rule, dt, day)]:
+            del self._views[day]
+
+    def _candidates(self, day: date):
+        """day这一天可能发生的任务id"""
+        yield from self._once.get(day, ())
+        buckets = self._rule_buckets
+        yield from buckets.get((DAILY, None), ())
+        yield from buckets.get((WEEKLY, day.weekday()), ())
+        yield from buckets.get((MONTHLY, day.day), ())
+        # 月末这天还包括日期超过当月天数的MONTHLY规则
+        last_day = calendar.monthrange(day.year, day.month)[1]
+        if day.day == last_day:
+            for month_day in range(last_day + 1, 32):
+                yield from buckets.get((MONTHLY, month_day), ())
+
+    def on(self, day: date) -> list:
+        """返回day这一天的 (发生时间, task_id)，按时间排序"""
+        view = self._views.get(day)
+        if view is not None:
+            return view
+        view = []
+        for task_id in self._candidates(day):
+            dt, rule = self._entries[task_id]
+            occurs_at = dt if rule is None else _occurrence_on(rule, dt, day)
+            if occurs_at is not None:
+                view.append((occurs_at, task_id))
+        view.sort()
+        self._views[day] = view
+        return view
+
+    def clear(self):
+        self._once = {}
+        self._rule_buckets = {}
+        self._entries = {}
+        self._views = {}
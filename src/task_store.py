@@ -0,0 +1,523 @@
+import gc
+import json
+import logging
+import numbers
+from array import array
+from datetime import datetime, timedelta
+from functools import lru_cache
+import numpy as np
+from .recurrence import compile_rule
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+# 任务类型编码，用于快照等按列保存的场合
+TYPE_CODES = {"ONCE": 0, "DAILY": 1, "WEEKLY": 2, "MONTHLY": 3}
+TYPE_NAMES = {code: name for name, code in TYPE_CODES.items()}
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+NO_TIME = -(2**63)  # 时间列中表示没有时间
+
+
+def parse_cycle_info(cycle_info) -> dict:
+    """将存储中的cycle_info（JSON字符串）解析为字典
+
+    相同的字符串共享同一个字典对象，调用方不应原地修改返回值。
+    """
+    if isinstance(cycle_info, dict):
+        return cycle_info
+    if not isinstance(cycle_info, str) or not cycle_info:  # Excel中的空单元格为NaN
+        return None
+    return _parse_cycle_json(cycle_info)
+
+
+@lru_cache(maxsize=1024)
+def _parse_cycle_json(cycle_info: str) -> dict:
+    try:
+        return json.loads(cycle_info)
+    except ValueError:
+        logger.warning(f"无法解析周期信息: {cycle_info}")
+        return None
+
+
+def parse_reminder_offsets(value) -> tuple:
+    """将提醒时间点（提前的分钟数）规范为去重后从大到小排列的元组
+
+    接受整数序列或存储中的逗号分隔字符串，没有有效的时间点时返回None，
+    表示使用默认的提醒时间点。
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = [part for part in value.split(",") if part.strip()]
+    elif isinstance(value, (int, float)):  # Excel中单个数字读出为数值
+        if value != value:  # NaN
+            return None
+        value = [value]
+    offsets = {_parse_offset(minutes) for minutes in value}
+    if any(minutes < 0 for minutes in offsets):
+        raise ValueError(f"提醒时间点不能为负数: {value}")
+    return tuple(sorted(offsets, reverse=True)) or None
+
+
+def _parse_offset(minutes) -> int:
+    """将单个提醒时间点转换为整数分钟，非数字或带小数的值抛出ValueError而不是截断"""
+    if isinstance(minutes, str):
+        minutes = minutes.strip()
+        try:
+            return int(minutes)
+        except ValueError:
+            minutes = _to_float(minutes)
+    if isinstance(minutes, bool) or not isinstance(minutes, numbers.Real):
+        raise ValueError(f"无法解析提醒时间点: {minutes!r}")
+    if not isinstance(minutes, numbers.Integral) and not float(minutes).is_integer():
+        raise ValueError(f"提醒时间点必须是整数分钟: {minutes!r}")
+    return int(minutes)
+
+
+def _to_float(text: str) -> float:
+    # Excel中的整数可能以"15.0"的形式读出
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError(f"无法解析提醒时间点: {text!r}") from None
+
+
+def format_cycle_info(cycle: dict) -> str:
+    """周期信息转换为存储使用的JSON字符串"""
+    if not cycle:
+        return None
+    return json.dumps(cycle, ensure_ascii=False)
+
+
+def format_reminder_offsets(offsets) -> str:
+    """提醒时间点转换为存储使用的逗号分隔字符串"""
+    if offsets is None:
+        return None
+    return ",".join(str(minutes) for minutes in offsets)
+
+
+def next_occurrence(dt: datetime, reminded: bool, rule, last_done: datetime) -> datetime:
+    """由任务的各字段计算下一次尚未完成的发生时间，没有则返回None"""
+    if rule is None:
+        return None if reminded else dt
+    # 起始时间本身也可能是一次发生
+    after = dt - timedelta(microseconds=1)
+    if last_done is not None and last_done > after:
+        after = last_done
+    return rule.next_after(after)
+
+
+class BaseTask:
+    """Task和StoredTask共用的方法，只通过字段读写任务数据"""
+
+    __slots__ = ()
+
+    def compile(self, task_type: str = None):
+        """根据类型（默认为当前类型）和周期信息重新编译周期规则
+
+        未知的类型按ONCE处理。
+        """
+        if task_type is None:
+            task_type = self.type
+        self.rule = (
+            compile_rule(task_type, self.cycle, self.datetime)
+            if TYPE_CODES.get(task_type, 0)
+            else None
+        )
+
+    @property
+    def type(self) -> str:
+        return self.rule.freq if self.rule is not None else "ONCE"
+
+    @type.setter
+    def type(self, task_type: str):
+        self.compile(task_type)
+
+    @property
+    def type_code(self) -> int:
+        return TYPE_CODES[self.type]
+
+    @property
+    def is_recurring(self) -> bool:
+        return self.rule is not None
+
+    def next_occurrence(self) -> datetime:
+        """下一次尚未完成的发生时间，没有则返回None"""
+        return next_occurrence(self.datetime, self.reminded, self.rule, self.last_done)
+
+    @property
+    def cycle_info(self) -> str:
+        """周期信息的JSON字符串形式，用于存储和导出"""
+        return format_cycle_info(self.cycle)
+
+    @property
+    def reminder_offsets_info(self) -> str:
+        """提醒时间点的字符串形式，用于存储"""
+        return format_reminder_offsets(self.reminder_offsets)
+
+    def to_row(self) -> dict:
+        """转换为存储后端使用的任务字典（不含id）"""
+        return {
+            "content": self.content,
+            "datetime": self.datetime,
+            "type": self.type,
+            "cycle_info": self.cycle_info,
+            "reminded": self.reminded,
+            "last_done": self.last_done,
+            "reminder_offsets": self.reminder_offsets_info,
+        }
+
+    def copy(self) -> "Task":
+        """复制为独立的Task，之后对任一方的修改互不影响"""
+        task = Task.__new__(Task)
+        for name in Task.__slots__:
+            setattr(task, name, getattr(self, name))
+        return task
+
+    def __repr__(self):
+        return f"Task(id={self.id}, content={self.content!r}, datetime={self.datetime}, type={self.type})"
+
+
+class Task(BaseTask):
+    """内存中的一条任务
+
+    使用__slots__避免每个实例携带__dict__，周期信息在载入时解析一次，
+    周期任务的规则编译后保存在rule中，相同的规则在任务之间共享。任务类型由rule得出，
+    不单独保存：设置type时立即按新类型编译，修改周期信息或时间后需调用compile()。
+
+    周期任务只保存一条记录：datetime是规则的起始时间，各次发生由规则按需生成，
+    last_done记录已完成的最近一次发生，不晚于它的发生都视为已完成。
+
+    reminder_offsets是该任务的提醒时间点（提前的分钟数，从大到小），
+    为None时使用默认的提醒时间点。
+    """
+
+    __slots__ = (
+        "id",
+        "content",
+        "datetime",
+        "reminded",
+        "cycle",
+        "rule",
+        "last_done",
+        "reminder_offsets",
+    )
+
+    def __init__(
+        self,
+        task_id: int,
+        content: str,
+        dt: datetime,
+        task_type: str = "ONCE",
+        cycle: dict = None,
+        reminded: bool = False,
+        last_done: datetime = None,
+        reminder_offsets=None,
+    ):
+        self.id = task_id
+        self.content = content
+        self.datetime = dt
+        self.cycle = cycle
+        self.reminded = reminded
+        self.last_done = last_done
+        self.reminder_offsets = parse_reminder_offsets(reminder_offsets)
+        self.compile(task_type)
+
+    @classmethod
+    def from_row(cls, row: dict) -> "Task":
+        """由存储后端的任务字典构造Task"""
+        return cls(
+            row["id"],
+            row["content"],
+            row["datetime"],
+            row["type"] or "ONCE",
+            parse_cycle_info(row["cycle_info"]),
+            bool(row["reminded"]),
+            row.get("last_done"),
+            row.get("reminder_offsets"),
+        )
+
+
+def _to_micros(dt) -> int:
+    """时间转换为自1970-01-01起的微秒数，None转换为NO_TIME"""
+    return NO_TIME if dt is None else (dt - EPOCH) // MICROSECOND
+
+
+def _from_micros(value: int) -> datetime:
+    return None if value == NO_TIME else EPOCH + timedelta(microseconds=value)
+
+
+def _column_property(column: str, doc: str, load=None, dump=None):
+    """StoredTask的字段，读写TaskStore中名为column的列
+
+    字段访问很频繁，按是否需要转换分别生成读写函数，少一次判断。
+    """
+
+    def row_of(task):
+        row = task._store._rows[task.id]
+        if row < 0:
+            raise KeyError(task.id)
+        return row
+
+    if load is None:
+
+        def fget(self):
+            return getattr(self._store, column)[row_of(self)]
+
+        def fset(self, value):
+            getattr(self._store, column)[row_of(self)] = value
+
+    else:
+
+        def fget(self):
+            return load(getattr(self._store, column)[row_of(self)])
+
+        def fset(self, value):
+            getattr(self._store, column)[row_of(self)] = dump(value)
+
+    return property(fget, fset, doc=doc)
+
+
+class StoredTask(BaseTask):
+    """TaskStore中一个任务的视图，与Task的用法相同
+
+    只保存所属的TaskStore和任务id，读写字段时直接访问TaskStore的列，
+    修改立即对其他视图可见。任务被删除后再访问字段会抛出KeyError。
+    """
+
+    __slots__ = ("_store", "id")
+
+    def __init__(self, store: "TaskStore", task_id: int):
+        self._store = store
+        self.id = task_id
+
+    content = _column_property("_contents", "任务内容")
+    datetime = _column_property("_times", "任务时间", _from_micros, _to_micros)
+    reminded = _column_property("_reminded", "是否已提醒", bool, int)
+    cycle = _column_property("_cycles", "周期信息")
+    rule = _column_property("_rules", "编译后的周期规则")
+    last_done = _column_property("_last_done", "已完成的最近一次发生", _from_micros, _to_micros)
+    reminder_offsets = _column_property("_offsets", "提醒时间点")
+
+
+# Task的字段 -> TaskStore中保存该字段的列
+COLUMNS = {
+    "id": "_ids",
+    "content": "_contents",
+    "datetime": "_times",
+    "reminded": "_reminded",
+    "cycle": "_cycles",
+    "rule": "_rules",
+    "last_done": "_last_done",
+    "reminder_offsets": "_offsets",
+}
+
+
+def _make_task(task_id, content, dt, reminded, cycle, rule, last_done, reminder_offsets):
+    # 字段已经解析和编译，跳过__init__直接填充
+    task = Task.__new__(Task)
+    task.id = task_id
+    task.content = content
+    task.datetime = dt
+    task.reminded = reminded
+    task.cycle = cycle
+    task.rule = rule
+    task.last_done = last_done
+    task.reminder_offsets = reminder_offsets
+    return task
+
+
+class TaskStore:
+    """任务的内存存储，按列保存
+
+    每个任务占一行：时间和last_done保存为自1970-01-01起的微秒数，已提醒标记占一个
+    字节，内容、周期信息、规则和提醒时间点保存对象引用（周期信息和规则在任务之间
+    共享，任务类型由规则得出）。每个任务不再常驻一个Task和datetime对象，按id访问或
+    遍历时生成引用该行的StoredTask；需要遍历全部任务的地方用select直接读列。
+
+    _rows以任务id为下标记录任务所在的行，-1表示没有该任务，每个id占4字节。
+    删除任务只清空所在的行，空行超过一半时整体压缩。
+    """
+
+    def __init__(self, tasks=()):
+        """由id互不相同的Task序列批量建立"""
+        tasks = list(tasks)
+        self._load(
+            [task.id for task in tasks],
+            [task.content for task in tasks],
+            [_to_micros(task.datetime) for task in tasks],
+            [task.reminded for task in tasks],
+            [task.cycle for task in tasks],
+            [task.rule for task in tasks],
+            [_to_micros(task.last_done) for task in tasks],
+            [task.reminder_offsets for task in tasks],
+        )
+
+    @classmethod
+    def from_columns(
+        cls, ids, contents, times, reminded, cycles, rules, last_done, reminder_offsets
+    ) -> "TaskStore":
+        """由各列直接建立，不经过Task对象
+
+        times和last_done是datetime64数组（NaT表示没有时间），其余为与ids等长的序列。
+        """
+        store = cls.__new__(cls)
+        store._load(
+            ids,
+            contents,
+            np.asarray(times, dtype="M8[us]").view(np.int64),
+            reminded,
+            cycles,
+            rules,
+            np.asarray(last_done, dtype="M8[us]").view(np.int64),
+            reminder_offsets,
+        )
+        return store
+
+    def _load(self, ids, contents, times, reminded, cycles, rules, last_done, offsets):
+        # times和last_done是微秒数的序列
+        ids = np.asarray(ids, dtype=np.int64)
+        rows = np.full(int(ids.max()) + 1 if len(ids) else 0, -1, dtype=np.int32)
+        rows[ids] = np.arange(len(ids), dtype=np.int32)
+        self._rows = array("i", rows.tobytes())  # 任务id -> 行号
+        self._ids = array("q", ids.tobytes())  # 行号 -> 任务id，-1表示空行
+        self._contents = list(contents)
+        self._times = array("q", np.asarray(times, dtype=np.int64).tobytes())
+        self._reminded = bytearray(np.asarray(reminded, dtype=np.bool_).tobytes())
+        self._cycles = list(cycles)
+        self._rules = list(rules)
+        self._last_done = array("q", np.asarray(last_done, dtype=np.int64).tobytes())
+        self._offsets = list(offsets)
+        self._count = len(ids)
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for task_id in self._ids:
+            if task_id >= 0:
+                yield StoredTask(self, task_id)
+
+    def __contains__(self, task_id):
+        return self._find(task_id) >= 0
+
+    def __getitem__(self, task_id) -> StoredTask:
+        if self._find(task_id) < 0:
+            raise KeyError(task_id)
+        return StoredTask(self, task_id)
+
+    def _find(self, task_id) -> int:
+        """任务所在的行，没有该任务时返回-1"""
+        rows = self._rows
+        return rows[task_id] if 0 <= task_id < len(rows) else -1
+
+    def views(self, task_ids) -> list:
+        """按顺序为task_ids中的任务生成StoredTask，用于select查出的id，不再逐个检查是否存在"""
+        # 批量创建大量对象时暂停循环垃圾回收，视图之间没有循环引用
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return [StoredTask(self, task_id) for task_id in task_ids]
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    def ids_by_time(self, recurring: bool = None) -> list:
+        """按任务时间排序的任务id列表，时间相同的按加入的顺序
+
+        recurring为True（False）时只包括周期任务（一次性任务）。
+        """
+        ids = np.frombuffer(self._ids, dtype=np.int64)
+        mask = ids >= 0
+        if recurring is not None:
+            is_recurring = np.fromiter(
+                (rule is not None for rule in self._rules), dtype=np.bool_, count=len(ids)
+            )
+            mask &= is_recurring == recurring
+        times = np.frombuffer(self._times, dtype=np.int64)[mask]
+        return ids[mask][np.argsort(times, kind="stable")].tolist()
+
+    def get(self, task_id) -> StoredTask:
+        return StoredTask(self, task_id) if self._find(task_id) >= 0 else None
+
+    def add(self, task: BaseTask):
+        """加入任务，已有相同id的任务时替换"""
+        task_id = task.id
+        row = self._find(task_id)
+        if row < 0:
+            if task_id >= len(self._rows):
+                self._rows.extend([-1] * (task_id + 1 - len(self._rows)))
+            row = self._rows[task_id] = len(self._ids)
+            self._ids.append(task_id)
+            self._contents.append(None)
+            self._times.append(NO_TIME)
+            self._reminded.append(0)
+            self._cycles.append(None)
+            self._rules.append(None)
+            self._last_done.append(NO_TIME)
+            self._offsets.append(None)
+            self._count += 1
+        self._contents[row] = task.content
+        self._times[row] = _to_micros(task.datetime)
+        self._reminded[row] = bool(task.reminded)
+        self._cycles[row] = task.cycle
+        self._rules[row] = task.rule
+        self._last_done[row] = _to_micros(task.last_done)
+        self._offsets[row] = task.reminder_offsets
+
+    def select(self, *fields):
+        """按行的顺序逐个生成任务指定字段的元组
+
+        fields是Task的字段名，如select("id", "datetime")。直接读取各列，时间列
+        整列批量转换为datetime，遍历全部任务时比逐个访问StoredTask的字段快得多。
+        """
+        columns = []
+        for field in fields:
+            column = getattr(self, COLUMNS[field])
+            if field in ("datetime", "last_done"):
+                # datetime64的NaT即NO_TIME，转换为None
+                column = np.frombuffer(column, dtype="M8[us]").tolist()
+            elif field == "reminded":
+                column = map(bool, column)
+            columns.append(column)
+        return (
+            values
+            for task_id, values in zip(self._ids, zip(*columns))
+            if task_id >= 0
+        )
+
+    def copies(self) -> list:
+        """全部任务的独立副本，之后对TaskStore的修改不影响副本"""
+        return [_make_task(*values) for values in self.select(*COLUMNS)]
+
+    def remove(self, task_id) -> Task:
+        """移除任务，返回它的独立副本"""
+        task = self[task_id].copy()
+        row = self._rows[task_id]
+        self._rows[task_id] = -1
+        self._ids[row] = -1
+        self._contents[row] = self._cycles[row] = self._rules[row] = None
+        self._offsets[row] = None
+        self._count -= 1
+        if len(self._ids) > 64 and self._count * 2 < len(self._ids):
+            self._compact()
+        return task
+
+    def _compact(self):
+        """去掉已删除任务留下的空行"""
+        keep = [row for row, task_id in enumerate(self._ids) if task_id >= 0]
+        self._ids = array("q", (self._ids[row] for row in keep))
+        self._contents = [self._contents[row] for row in keep]
+        self._times = array("q", (self._times[row] for row in keep))
+        self._reminded = bytearray(self._reminded[row] for row in keep)
+        self._cycles = [self._cycles[row] for row in keep]
+        self._rules = [self._rules[row] for row in keep]
+        self._last_done = array("q", (self._last_done[row] for row in keep))
+        self._offsets = [self._offsets[row] for row in keep]
+        for row, task_id in enumerate(self._ids):
+            self._rows[task_id] = row
+
+    def clear(self):
+        self._load([], [], [], [], [], [], [], [])
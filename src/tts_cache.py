@@ -0,0 +1,148 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from .config import AppConfig
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+
+def cache_key(text: str) -> str:
+    """按文本和当前发音参数计算缓存键，参数改变后旧的语音不会被命中"""
+    params = [
+        text,
+        AppConfig.TTS_VOICE,
+        AppConfig.TTS_SPEED,
+        AppConfig.TTS_VOLUME,
+        AppConfig.TTS_PITCH,
+        AppConfig.TTS_SAMPLE_RATE,
+        AppConfig.TTS_CHANNELS,
+        AppConfig.TTS_SAMPLE_WIDTH,
+    ]
+    raw = json.dumps(params, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()
+
+
+class TTSCache:
+    """以内容哈希为键的合成语音缓存
+
+    两级缓存：磁盘上的WAV文件按总大小上限以LRU淘汰，最近使用的若干条
+    同时保存在内存中。磁盘文件的修改时间记录最近使用时间，重启后按它
+    恢复LRU顺序。可在多个线程中使用。
+    """
+
+    def __init__(self, cache_dir=None, max_bytes: int = None, memory_items: int = None):
+        self.cache_dir = Path(cache_dir or AppConfig.TTS_CACHE_DIR)
+        self.max_bytes = max_bytes or AppConfig.TTS_CACHE_MAX_BYTES
+        self.memory_items = memory_items or AppConfig.TTS_CACHE_MEMORY_ITEMS
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> WAV数据，最近使用的在末尾
+        self._files = OrderedDict()  # key -> 文件大小，最近使用的在末尾
+        self._total_bytes = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entries = []
+        for path in self.cache_dir.glob("*.wav"):
+            stat = path.stat()
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._files[key] = size
+            self._total_bytes += size
+        logger.debug(f"语音缓存已载入: {len(self._files)} 条, {self._total_bytes} 字节")
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.wav"
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._memory or key in self._files
+
+    def get(self, key: str) -> bytes:
+        """读取缓存的WAV数据，未命中时返回None"""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self._files.move_to_end(key)
+                self.memory_hits += 1
+                return data
+            if key not in self._files:
+                self.misses += 1
+                return None
+            path = self._path(key)
+            try:
+                data = path.read_bytes()
+                os.utime(path)
+            except OSError as e:
+                logger.warning(f"读取语音缓存失败: {e}")
+                self._total_bytes -= self._files.pop(key)
+                self.misses += 1
+                return None
+            self._files.move_to_end(key)
+            self._remember(key, data)
+            self.disk_hits += 1
+            return data
+
+    def put(self, key: str, data: bytes):
+        """保存WAV数据，超出大小上限时淘汰最久未使用的条目"""
+        with self._lock:
+            path = self._path(key)
+            temp_file = path.with_suffix(".tmp")
+            try:
+                temp_file.write_bytes(data)
+                os.replace(temp_file, path)
+            except OSError as e:
+                logger.error(f"写入语音缓存失败: {e}", exc_info=True)
+                return
+            self._total_bytes -= self._files.pop(key, 0)
+            self._files[key] = len(data)
+            self._total_bytes += len(data)
+            self._remember(key, data)
+            self._evict()
+
+    def discard(self, key: str):
+        """删除一条缓存"""
+        with self._lock:
+            self._memory.pop(key, None)
+            size = self._files.pop(key, None)
+            if size is None:
+                return
+            self._total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError as e:
+                logger.warning(f"删除语音缓存失败: {e}")
+
+    def _remember(self, key: str, data: bytes):
+        self._memory[key] = data
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and len(self._files) > 1:
+            key, size = self._files.popitem(last=False)
+            self._total_bytes -= size
+            self._memory.pop(key, None)
+            try:
+                os.remove(self._path(key))
+            except OSError as e:
+                logger.warning(f"删除语音缓存失败: {e}")
+
+    def stats(self) -> dict:
+        """命中统计和当前占用"""
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "entries": len(self._files),
+                "bytes": self._total_bytes,
+            }
@@ -0,0 +1,134 @@
+import queue
+import logging
+import threading
+from .config import AppConfig
+from .xf_tts_service import TTSService
+
+# 设置日志
+logger = logging.getLogger(__name__)
+
+_STOP = object()  # 通知播报线程退出
+
+
+class TTSWorker(threading.Thread):
+    """在后台线程中按顺序合成并播放提醒语音
+
+    提醒消息进入有界的先进先出队列，由播报线程逐条合成、播放，界面线程
+    只负责入队，从不等待语音合成或播放。队列满时丢弃最早的待播消息，
+    避免积压的过时提醒无限推迟新的提醒。
+
+    不依赖Qt，界面和无界面的提醒服务都可以使用。
+    """
+
+    def __init__(self, maxsize: int = None):
+        super().__init__(name="tts-worker", daemon=True)
+        self._queue = queue.Queue(maxsize or AppConfig.TTS_QUEUE_SIZE)
+
+    def speak(self, text: str):
+        """将一条消息加入播报队列，立即返回"""
+        while True:
+            try:
+                self._queue.put_nowait(text)
+                return
+            except queue.Full:
+                try:
+                    dropped = self._queue.get_nowait()
+                    logger.warning(f"播报队列已满，丢弃最早的消息: {dropped}")
+                except queue.Empty:
+                    pass
+
+    def pending(self) -> int:
+        """队列中等待播报的消息数"""
+        return self._queue.qsize()
+
+    def stop(self, timeout: float = None):
+        """丢弃未播报的消息，等待当前消息播完后退出
+
+        最多等待timeout秒，超时后不再等待（线程为守护线程，不会阻止程序退出）。
+        """
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        self._queue.put(_STOP)
+        self.join(timeout)
+        if self.is_alive():
+            logger.warning("播报线程未能及时退出")
+
+    def run(self):
+        tts_service = TTSService()
+        while True:
+            text = self._queue.get()
+            if text is _STOP:
+                return
+            try:
+                if not tts_service.text_to_speech(text):
+                    logger.warning(f"语音播报失败: {text}")
+            except Exception as e:
+                logger.error(f"播报线程错误: {e}", exc_info=True)
+
+
+class PresynthWorker(threading.Thread):
+    """在后台线程中提前合成即将触发的提醒语音并写入缓存
+
+    提醒到期时播报线程直接从缓存读取语音，不必等待网络合成。
+    """
+
+    def __init__(self):
+        super().__init__(name="tts-presynth", daemon=True)
+        self.tts_service = TTSService()
+        self._queue = queue.Queue()
+        self._wanted = set()  # 已请求且未取消的缓存键
+        self._current = None  # 正在合成的缓存键
+        self._current_discarded = False  # 正在合成的语音已被作废
+        self._lock = threading.Lock()
+
+    def request(self, key: str, text: str):
+        """请求预合成一段语音，已缓存或已在队列中时忽略"""
+        with self._lock:
+            if key in self._wanted or key in self.tts_service.cache:
+                return
+            self._wanted.add(key)
+        self._queue.put((key, text))
+
+    def discard(self, key: str):
+        """取消尚未进行的预合成，并删除已合成的语音"""
+        with self._lock:
+            self._wanted.discard(key)
+            if key == self._current:
+                self._current_discarded = True
+        self.tts_service.cache.discard(key)
+
+    def stop(self, timeout: float = None):
+        """丢弃未进行的预合成，等待当前合成结束后退出，最多等待timeout秒"""
+        with self._lock:
+            self._wanted.clear()
+        self._queue.put(_STOP)
+        self.join(timeout)
+        if self.is_alive():
+            logger.warning("预合成线程未能及时退出")
+
+    def run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            key, text = item
+            with self._lock:
+                if key not in self._wanted:
+                    continue
+                self._current = key
+                self._current_discarded = False
+            try:
+                self.tts_service.synthesize(text)
+            except Exception as e:
+                logger.error(f"预合成语音失败: {e}", exc_info=True)
+            finally:
+                with self._lock:
+                    self._wanted.discard(key)
+                    self._current = None
+                    discarded = self._current_discarded
+                # 合成期间任务被修改或删除，合成结果作废
+                if discarded:
+                    self.tts_service.cache.discard(key)
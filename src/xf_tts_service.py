@@ -11,12 +11,15 @@ from wsgiref.handlers import format_date_time
 from datetime import datetime
 from time import mktime
 import _thread as thread
+import io
 import os
 import logging
+import threading
 import pygame
 import wave
 import struct
 from .config import AppConfig
+from .tts_cache import TTSCache, cache_key
 
 logger = logging.getLogger(__name__)
 
@@ -26,8 +29,13 @@ class TTSService:
 
     def __new__(cls):
         if cls._instance is None:
-            cls._instance = super(TTSService, cls).__new__(cls)
-            cls._instance._initialized = False
+            instance = super(TTSService, cls).__new__(cls)
+            instance._initialized = False
+            # 锁和缓存只创建一次，音频初始化失败后再次构造时不会替换掉正在使用的锁
+            # 合成使用共享的临时文件，同一时间只能进行一次
+            instance._synthesize_lock = threading.Lock()
+            instance.cache = None
+            cls._instance = instance
         return cls._instance
 
     def __init__(self):
@@ -35,8 +43,10 @@ class TTSService:
             return
 
         try:
-            # 创建临时文件目录
-            os.makedirs(os.path.dirname(AppConfig.TTS_OUTPUT_FILE), exist_ok=True)
+            if self.cache is None:
+                # 创建临时文件目录
+                os.makedirs(os.path.dirname(AppConfig.TTS_OUTPUT_FILE), exist_ok=True)
+                self.cache = TTSCache()
             pygame.mixer.init()
             self._initialized = True
             logger.debug("TTS服务初始化成功")
@@ -51,32 +61,69 @@ class TTSService:
                 logger.error("TTS服务未正确初始化")
                 return False
 
-            # 创建WebSocket参数
-            ws_param = WsParam(
-                AppConfig.XF_APPID, AppConfig.XF_API_KEY, AppConfig.XF_API_SECRET, text
-            )
-
-            # 建立WebSocket连接
-            websocket.enableTrace(False)
-            ws_url = ws_param.create_url()
-            ws = websocket.WebSocketApp(
-                ws_url,
-                on_message=self._on_message,
-                on_error=self._on_error,
-                on_close=self._on_close,
-            )
-            ws.on_open = lambda ws: self._on_open(ws, ws_param)
-
-            # 运行WebSocket连接
-            ws.run_forever(sslopt={"cert_reqs": ssl.CERT_NONE})
+            data = self.synthesize(text)
+            if data is None:
+                return False
 
             # 播放生成的音频
-            return self._play_audio()
+            return self._play_audio(data)
 
         except Exception as e:
             logger.error(f"TTS转换失败: {e}", exc_info=True)
             return False
 
+    def synthesize(self, text):
+        """合成语音，返回WAV数据，失败时返回None
+
+        相同文本和发音参数的语音从缓存读取，不再请求讯飞接口。
+        """
+        key = cache_key(text)
+        data = self.cache.get(key)
+        if data is not None:
+            logger.debug(f"语音缓存命中: {text}")
+            return data
+
+        with self._synthesize_lock:
+            # 等待期间其他线程（如预合成）可能已合成了同一段文本
+            if key in self.cache:
+                return self.cache.get(key)
+            return self._synthesize(key, text)
+
+    def _synthesize(self, key, text):
+        """请求讯飞接口合成语音并写入缓存"""
+        # 清除上次残留的音频，避免合成失败时把旧音频当作结果缓存
+        temp_pcm = AppConfig.APP_DIR / "temp" / "temp.pcm"
+        for path in (AppConfig.TTS_OUTPUT_FILE, temp_pcm):
+            if os.path.exists(path):
+                os.remove(path)
+
+        # 创建WebSocket参数
+        ws_param = WsParam(
+            AppConfig.XF_APPID, AppConfig.XF_API_KEY, AppConfig.XF_API_SECRET, text
+        )
+
+        # 建立WebSocket连接
+        websocket.enableTrace(False)
+        ws_url = ws_param.create_url()
+        ws = websocket.WebSocketApp(
+            ws_url,
+            on_message=self._on_message,
+            on_error=self._on_error,
+            on_close=self._on_close,
+        )
+        ws.on_open = lambda ws: self._on_open(ws, ws_param)
+
+        # 运行WebSocket连接
+        ws.run_forever(sslopt={"cert_reqs": ssl.CERT_NONE})
+
+        if not os.path.exists(AppConfig.TTS_OUTPUT_FILE):
+            logger.error("音频文件不存在")
+            return None
+        with open(AppConfig.TTS_OUTPUT_FILE, "rb") as f:
+            data = f.read()
+        self.cache.put(key, data)
+        return data
+
     def _on_message(self, ws, message, *args):
         """处理WebSocket消息回调"""
         try:
@@ -149,13 +196,9 @@ class TTSService:
         except Exception as e:
             logger.error(f"PCM转WAV失败: {e}", exc_info=True)
 
-    def _play_audio(self):
-        """播放音频文件"""
+    def _play_audio(self, data):
+        """播放WAV数据"""
         try:
-            if not os.path.exists(AppConfig.TTS_OUTPUT_FILE):
-                logger.error("音频文件不存在")
-                return False
-
             try:
                 # 初始化pygame音频
                 pygame.mixer.quit()
@@ -164,7 +207,7 @@ class TTSService:
                     channels=AppConfig.TTS_CHANNELS,
                     size=-16,
                 )
-                pygame.mixer.music.load(str(AppConfig.TTS_OUTPUT_FILE))
+                pygame.mixer.music.load(io.BytesIO(data), "wav")
                 pygame.mixer.music.play()
 
                 # 等待播放完成
@@ -176,6 +219,8 @@ class TTSService:
             except pygame.error as pe:
                 logger.error(f"PyGame错误: {pe}")
                 # 使用系统命令播放
+                with open(AppConfig.TTS_OUTPUT_FILE, "wb") as f:
+                    f.write(data)
                 os.system(f"aplay {AppConfig.TTS_OUTPUT_FILE}")
                 return True
 
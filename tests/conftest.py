@@ -0,0 +1,20 @@
+import pytest
+from src.config import AppConfig
+
+
+@pytest.fixture
+def app_dir(tmp_path, monkeypatch):
+    """将全部数据文件放到临时目录中"""
+    monkeypatch.setattr(AppConfig, "APP_DIR", tmp_path)
+    monkeypatch.setattr(AppConfig, "DATA_FILE", tmp_path / "data.xlsx")
+    monkeypatch.setattr(AppConfig, "DB_FILE", tmp_path / "data.db")
+    monkeypatch.setattr(AppConfig, "SNAPSHOT_FILE", tmp_path / "data.snap")
+    monkeypatch.setattr(AppConfig, "ARCHIVE_FILE", tmp_path / "archive.db")
+    monkeypatch.setattr(AppConfig, "LOCK_FILE", tmp_path / "smartmemo.lock")
+    monkeypatch.setattr(
+        AppConfig, "REMINDER_LEDGER_FILE", tmp_path / "reminder_ledger.bin"
+    )
+    monkeypatch.setattr(AppConfig, "TTS_CACHE_DIR", tmp_path / "tts_cache")
+    monkeypatch.setattr(AppConfig, "IMPORT_STATE_DIR", tmp_path / "imports")
+    monkeypatch.setattr(AppConfig, "WRITE_BEHIND", False)
+    return tmp_path
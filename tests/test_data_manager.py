@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.data_manager import DataManager
+from src.task_store import parse_reminder_offsets
+
+
+def test_search_does_not_swallow_missed_occurrences(app_dir):
+    anchor = (datetime.now() - timedelta(days=1, hours=1)).replace(
+        second=0, microsecond=0
+    )
+    data_manager = DataManager()
+    task_id = data_manager.add_task(
+        "开会", anchor, "DAILY", {"time": anchor.strftime("%H:%M")}
+    )
+    data_manager.close()
+
+    # 重启后anchor之后的发生都已错过，搜索不应跳过它们
+    data_manager = DataManager()
+    try:
+        assert [task.id for task in data_manager.search("会")] == [task_id]
+        missed = data_manager.missed_occurrences()
+        assert [item[0] for item in missed] == [task_id]
+    finally:
+        data_manager.close()
+
+
+@pytest.mark.parametrize("offsets", ["abc", "15,x", [15.5], "7.5", [None]])
+def test_invalid_reminder_offsets_are_rejected(offsets):
+    with pytest.raises(ValueError):
+        parse_reminder_offsets(offsets)
+
+
+def test_integral_reminder_offsets_are_accepted():
+    assert parse_reminder_offsets("5, 15.0") == (15, 5)
+    assert parse_reminder_offsets(30.0) == (30,)
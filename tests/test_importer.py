@@ -0,0 +1,28 @@
+import threading
+import time
+
+import pytest
+
+from src.importer import ImportCancelled, ImportJob
+
+
+def test_cancel_does_not_wait_for_requests_in_flight(app_dir, tmp_path):
+    filepath = tmp_path / "tasks.txt"
+    filepath.write_text("\n".join(f"任务{i}" for i in range(10)), encoding="utf-8")
+    started = threading.Event()
+    release = threading.Event()
+
+    def parse(text):
+        # 模拟一直不返回的AI请求
+        started.set()
+        release.wait(10)
+        return []
+
+    job = ImportJob(filepath, chunk_lines=1)
+    begin = time.monotonic()
+    try:
+        with pytest.raises(ImportCancelled):
+            job.run(parse, lambda index, tasks: None, is_cancelled=started.is_set)
+        assert time.monotonic() - begin < 2
+    finally:
+        release.set()
@@ -0,0 +1,12 @@
+from src.instance_lock import InstanceLock
+
+
+def test_second_instance_cannot_take_the_lock(app_dir):
+    first, second = InstanceLock(), InstanceLock()
+    assert first.acquire()
+    try:
+        assert not second.acquire()
+    finally:
+        first.release()
+    assert second.acquire()
+    second.release()
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.recurrence import compile_rule
+
+
+def test_monthly_day_31_is_clamped_to_month_end():
+    rule = compile_rule("MONTHLY", {"day": 31, "time": "09:30"})
+
+    assert rule.next_after(datetime(2025, 1, 31, 9, 30)) == datetime(2025, 2, 28, 9, 30)
+    assert rule.next_after(datetime(2024, 1, 31, 9, 30)) == datetime(2024, 2, 29, 9, 30)
+    assert rule.next_after(datetime(2025, 4, 1)) == datetime(2025, 4, 30, 9, 30)
+    # 短月份取月末后，下个月仍回到31号
+    assert rule.next_after(datetime(2025, 2, 28, 9, 30)) == datetime(2025, 3, 31, 9, 30)
+
+
+def test_monthly_rule_fires_once_every_month():
+    rule = compile_rule("MONTHLY", {"day": 31, "time": "09:30"})
+    occurrence = datetime(2024, 12, 31, 9, 30)
+    months = []
+    for _ in range(12):
+        occurrence = rule.next_after(occurrence)
+        months.append(occurrence.month)
+    assert months == list(range(1, 13))
+    assert occurrence == datetime(2025, 12, 31, 9, 30)
+
+
+@pytest.mark.parametrize(
+    "task_type, cycle_info, period",
+    [
+        ("DAILY", {"time": "00:00"}, timedelta(days=1)),
+        ("WEEKLY", {"day": "周日", "time": "23:59"}, timedelta(days=7)),
+        ("MONTHLY", {"day": 31, "time": "23:59"}, timedelta(days=31)),
+    ],
+)
+def test_next_after_is_strictly_later_and_within_one_period(
+    task_type, cycle_info, period
+):
+    rule = compile_rule(task_type, cycle_info)
+    after = datetime(2023, 12, 25)
+    for _ in range(800):
+        occurrence = rule.next_after(after)
+        assert after < occurrence <= after + period
+        # 恰好落在发生时间上时返回下一次
+        after = occurrence
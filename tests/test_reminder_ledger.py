@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+from src.reminder_ledger import RECORD, ReminderLedger
+
+
+def test_ledger_replays_delivered_reminders(tmp_path):
+    path = tmp_path / "ledger.bin"
+    occurs_at = datetime.now().replace(microsecond=0)
+    ledger = ReminderLedger(path)
+    ledger.record_many([(1, occurs_at, 30), (1, occurs_at, 5), (2, occurs_at, 5)])
+    ledger.record(1, occurs_at, 30)  # 重复的记录不再写入
+    ledger.close()
+    assert path.stat().st_size == 3 * RECORD.size
+
+    ledger = ReminderLedger(path)
+    try:
+        assert ledger.delivered(1, occurs_at) == {30, 5}
+        assert ledger.delivered(2, occurs_at) == {5}
+        assert ledger.delivered(3, occurs_at) == set()
+    finally:
+        ledger.close()
+
+
+def test_ledger_ignores_partial_trailing_record(tmp_path):
+    path = tmp_path / "ledger.bin"
+    occurs_at = datetime.now().replace(microsecond=0)
+    ledger = ReminderLedger(path)
+    ledger.record(1, occurs_at, 30)
+    ledger.close()
+    # 模拟写入中途退出
+    with open(path, "ab") as f:
+        f.write(RECORD.pack(2, 0, 5)[:7])
+
+    ledger = ReminderLedger(path)
+    ledger.record(3, occurs_at, 5)
+    ledger.close()
+
+    ledger = ReminderLedger(path)
+    try:
+        assert len(ledger) == 2
+        assert ledger.delivered(1, occurs_at) == {30}
+        assert ledger.delivered(3, occurs_at) == {5}
+    finally:
+        ledger.close()
+
+
+def test_ledger_prune_rewrites_file(tmp_path):
+    path = tmp_path / "ledger.bin"
+    now = datetime.now().replace(microsecond=0)
+    old = now - timedelta(days=10)
+    ledger = ReminderLedger(path, retention_days=7)
+    ledger.record_many([(1, old, 30), (2, now, 30), (2, now, 5)])
+    ledger.prune(now)
+    ledger.record(3, now, 5)
+    assert ledger.delivered(1, old) == set()
+    ledger.close()
+    assert path.stat().st_size == 3 * RECORD.size
+
+    ledger = ReminderLedger(path, retention_days=7)
+    try:
+        assert len(ledger) == 3
+        assert ledger.delivered(2, now) == {30, 5}
+        assert ledger.delivered(3, now) == {5}
+    finally:
+        ledger.close()
@@ -0,0 +1,37 @@
+import time
+from datetime import datetime, timedelta
+import pytest
+from src.daemon import ReminderDaemon
+from src.data_manager import DataManager
+
+
+@pytest.fixture
+def daemon(app_dir):
+    data_manager = DataManager()
+    daemon = ReminderDaemon(data_manager)
+    daemon._start()
+    yield daemon
+    daemon.stop()
+    data_manager.close()
+
+
+def test_runtime_recurring_task_with_past_anchor_is_scheduled(daemon):
+    data_manager = daemon.data_manager
+    anchor = (datetime.now() - timedelta(hours=2)).replace(second=0, microsecond=0)
+
+    task_id = data_manager.add_task(
+        "吃药", anchor, "DAILY", {"time": anchor.strftime("%H:%M")}
+    )
+
+    expected = anchor + timedelta(days=1)
+    assert data_manager.next_occurrence(task_id) == expected
+    assert data_manager.pending_occurrences() == [(task_id, expected)]
+    assert daemon.scheduler.scheduled(task_id) == expected
+    assert daemon._deadline is not None
+
+
+def test_timer_wakes_often_enough_to_notice_suspend(daemon):
+    daemon.data_manager.add_task("开会", datetime.now() + timedelta(days=1))
+
+    # 定时器按单调时间计时，休眠期间不走，唤醒后应很快检查错过的提醒
+    assert daemon._deadline - time.monotonic() <= 60
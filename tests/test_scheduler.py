@@ -0,0 +1,46 @@
+import random
+from datetime import datetime, timedelta
+
+from src.scheduler import HeapScheduler, TimingWheelScheduler
+
+OFFSETS = [60, 30, 5, 0]
+
+
+def test_wheel_fires_the_same_reminders_as_heap():
+    rng = random.Random(0)
+    start = datetime(2026, 1, 1, 23, 17, 30)
+    heap, wheel = HeapScheduler(), TimingWheelScheduler(start)
+    horizon = 3 * 24 * 60 * 60
+
+    def apply(task_id, occurs_at):
+        for scheduler in (heap, wheel):
+            if occurs_at is None:
+                scheduler.cancel(task_id)
+            else:
+                scheduler.schedule(task_id, occurs_at, OFFSETS)
+
+    for task_id in range(500):
+        apply(task_id, start + timedelta(seconds=rng.randrange(horizon)))
+
+    fired = 0
+    # 不按整分钟检查，覆盖同一分钟内尚未到秒的提醒
+    now = start
+    while now < start + timedelta(seconds=horizon + 3600):
+        now += timedelta(seconds=rng.randrange(20, 400))
+        for _ in range(3):
+            task_id = rng.randrange(600)
+            if rng.random() < 0.2:
+                apply(task_id, None)
+            else:
+                apply(task_id, now + timedelta(seconds=rng.randrange(-600, horizon)))
+        due = heap.pop_due(now)
+        assert wheel.pop_due(now) == due
+        assert len(wheel) == len(heap)
+        next_fire = heap.next_fire_time()
+        if next_fire is None:
+            assert wheel.next_fire_time() is None
+        else:
+            # 时间轮对较远的提醒返回所在桶的起始时间，不会晚于真实时间
+            assert wheel.next_fire_time() <= next_fire
+        fired += len(due)
+    assert fired > 1000
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+from src.config import AppConfig
+from src.data_manager import DataManager
+from src.snapshot import read_snapshot
+from src.storage import SQLiteStorage
+
+
+def make_row(content):
+    return {
+        "content": content,
+        "datetime": datetime.now() + timedelta(days=1),
+        "type": "ONCE",
+        "cycle_info": None,
+        "reminded": False,
+        "last_done": None,
+        "reminder_offsets": None,
+    }
+
+
+def contents(data_manager):
+    return sorted(task.content for task in data_manager.get_all_tasks())
+
+
+def create_tasks(app_dir):
+    """建立任务并在关闭时写出快照，返回快照对应的stamp"""
+    data_manager = DataManager()
+    data_manager.add_task("每月", datetime(2025, 1, 31, 9, 30), "MONTHLY", {"day": 31})
+    data_manager.add_task("每周", datetime(2025, 1, 6, 8, 0), "WEEKLY", {})
+    # 一次性任务放在将来，不会被归档
+    data_manager.add_task("一次", datetime.now() + timedelta(days=1))
+    data_manager.close()
+    storage = SQLiteStorage(AppConfig.DB_FILE)
+    try:
+        return storage.stamp()
+    finally:
+        storage.close()
+
+
+def test_snapshot_matches_storage(app_dir):
+    stamp = create_tasks(app_dir)
+    snapshot = read_snapshot(AppConfig.SNAPSHOT_FILE, stamp)
+    assert snapshot is not None
+
+    storage = SQLiteStorage(AppConfig.DB_FILE)
+    try:
+        rows = storage.load()
+    finally:
+        storage.close()
+    assert [task.to_row() for task in snapshot.copies()] == [
+        {key: row[key] for key in task.to_row()}
+        for task, row in zip(snapshot.copies(), rows)
+    ]
+    rules = [task.rule for task in snapshot.copies()]
+    assert (rules[0].day, rules[0].hour, rules[0].minute) == (31, 9, 30)
+    assert rules[1].weekday == 0
+    assert rules[2] is None
+
+
+def test_stale_snapshot_falls_back_to_storage(app_dir):
+    stamp = create_tasks(app_dir)
+
+    # 绕过DataManager修改存储，快照未随之更新
+    storage = SQLiteStorage(AppConfig.DB_FILE)
+    try:
+        storage.insert(make_row("新增"))
+        assert storage.stamp() != stamp
+        assert read_snapshot(AppConfig.SNAPSHOT_FILE, storage.stamp()) is None
+    finally:
+        storage.close()
+
+    data_manager = DataManager()
+    try:
+        assert contents(data_manager) == ["一次", "新增", "每周", "每月"]
+    finally:
+        data_manager.close()
+
+
+def test_corrupt_snapshot_falls_back_to_storage(app_dir):
+    stamp = create_tasks(app_dir)
+    data = AppConfig.SNAPSHOT_FILE.read_bytes()
+    AppConfig.SNAPSHOT_FILE.write_bytes(data[: len(data) // 2])
+    assert read_snapshot(AppConfig.SNAPSHOT_FILE, stamp) is None
+
+    data_manager = DataManager()
+    try:
+        assert contents(data_manager) == ["一次", "每周", "每月"]
+    finally:
+        data_manager.close()
+    # 回退载入后重新写出了有效的快照
+    assert read_snapshot(AppConfig.SNAPSHOT_FILE, stamp) is not None
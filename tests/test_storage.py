@@ -0,0 +1,95 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from src.storage import TASK_COLUMNS, ExcelStorage, SQLiteStorage, WriteBehindStorage
+
+
+def make_row(content):
+    return {
+        "content": content,
+        "datetime": datetime(2025, 1, 1, 8, 0),
+        "type": "ONCE",
+        "cycle_info": None,
+        "reminded": False,
+        "last_done": None,
+        "reminder_offsets": None,
+    }
+
+
+def test_excel_storage_does_not_reuse_deleted_ids(tmp_path):
+    # 旧版本写出的文件只有任务表，没有记录last_id的meta表
+    excel_file = tmp_path / "data.xlsx"
+    pd.DataFrame(
+        [[1] + [make_row("a")[col] for col in TASK_COLUMNS],
+         [2] + [make_row("b")[col] for col in TASK_COLUMNS]],
+        columns=["id"] + TASK_COLUMNS,
+    ).to_excel(excel_file, sheet_name="tasks", index=False)
+
+    storage = ExcelStorage(excel_file)
+    storage.delete(2)
+    assert ExcelStorage(excel_file).insert(make_row("c")) == 3
+
+    storage = ExcelStorage(excel_file)
+    storage.clear()
+    assert ExcelStorage(excel_file).insert(make_row("d")) == 4
+
+
+@pytest.fixture
+def write_behind(tmp_path):
+    # 合并窗口足够长，后台线程不会自行写入，由测试调用flush
+    storage = WriteBehindStorage(SQLiteStorage(tmp_path / "data.db"), delay=60)
+    yield storage
+    storage.close()
+
+
+def test_write_behind_coalesces_changes_into_one_batch(write_behind, monkeypatch):
+    batches = []
+    apply = write_behind.backend.apply
+
+    def record_apply(cleared, changes, meta):
+        batches.append(dict(changes))
+        apply(cleared, changes, meta)
+
+    monkeypatch.setattr(write_behind.backend, "apply", record_apply)
+
+    kept = write_behind.insert(make_row("a"))
+    write_behind.update(kept, {"content": "b"})
+    write_behind.update(kept, {"reminded": True})
+    dropped = write_behind.insert(make_row("c"))
+    write_behind.delete(dropped)
+    write_behind.flush()
+
+    assert batches == [{kept: ("insert", {**make_row("b"), "reminded": True})}]
+    rows = write_behind.backend.load()
+    assert [(row["id"], row["content"]) for row in rows] == [(kept, "b")]
+    # 合并掉的插入也占用了id，之后不会再分配
+    assert write_behind.backend.max_id() == dropped
+
+
+def test_write_behind_requeues_failed_batch(write_behind, monkeypatch):
+    task_id = write_behind.insert(make_row("a"))
+    write_behind.flush()
+
+    apply = write_behind.backend.apply
+
+    def fail(cleared, changes, meta):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(write_behind.backend, "apply", fail)
+    write_behind.update(task_id, {"content": "b", "reminded": True})
+    new_id = write_behind.insert(make_row("c"))
+    with pytest.raises(OSError):
+        write_behind.flush()
+
+    # 失败后的修改覆盖在放回队列的修改之上
+    monkeypatch.setattr(write_behind.backend, "apply", apply)
+    write_behind.update(task_id, {"content": "d"})
+    write_behind.flush()
+
+    rows = {row["id"]: row for row in write_behind.backend.load()}
+    assert sorted(rows) == [task_id, new_id]
+    assert rows[task_id]["content"] == "d"
+    assert rows[task_id]["reminded"]
+    assert rows[new_id]["content"] == "c"
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.task_store import Task, TaskStore
+
+
+def make_tasks(n):
+    start = datetime(2026, 1, 1, 8, 0)
+    tasks = []
+    for i in range(1, n + 1):
+        if i % 4 == 0:
+            tasks.append(Task(i, f"周期{i}", start, "DAILY", {"time": "08:00"}))
+        else:
+            tasks.append(Task(i, f"任务{i}", start + timedelta(minutes=n - i)))
+    return tasks
+
+
+def test_stored_task_writes_through_to_the_store():
+    store = TaskStore(make_tasks(3))
+    task = store[2]
+    task.content = "改过的"
+    task.datetime = datetime(2026, 2, 1, 9, 30, 15, 123)
+    task.reminded = True
+
+    again = store[2]
+    assert again.content == "改过的"
+    assert again.datetime == datetime(2026, 2, 1, 9, 30, 15, 123)
+    assert again.reminded is True
+    assert again.last_done is None
+    assert store[1].content == "任务1"
+
+
+def test_removed_tasks_are_gone_after_compaction():
+    store = TaskStore(make_tasks(200))
+    kept = store[150]
+    for task_id in range(1, 150):
+        removed = store.remove(task_id)
+        assert removed.id == task_id
+    assert len(store) == 51
+    assert 10 not in store and store.get(10) is None
+    with pytest.raises(KeyError):
+        store[10]
+    # 压缩后行号改变，之前取得的视图仍然指向原来的任务
+    assert kept.content == "任务150"
+    assert [task.id for task in store] == list(range(150, 201))
+
+
+def test_select_and_copies_match_the_tasks():
+    tasks = make_tasks(8)
+    store = TaskStore(tasks)
+    store.add(Task(20, "新任务", datetime(2026, 3, 1)))
+
+    selected = list(store.select("id", "datetime", "rule"))
+    assert selected[:8] == [(task.id, task.datetime, task.rule) for task in tasks]
+    assert selected[8] == (20, datetime(2026, 3, 1), None)
+
+    copies = store.copies()
+    store[20].content = "又改了"
+    assert copies[8].content == "新任务"
+    assert [task.to_row() for task in copies[:8]] == [task.to_row() for task in tasks]
+
+
+def test_ids_by_time():
+    store = TaskStore(make_tasks(8))
+    assert store.ids_by_time(recurring=False) == [7, 6, 5, 3, 2, 1]
+    assert store.ids_by_time(recurring=True) == [4, 8]
+    assert store.ids_by_time() == [4, 8, 7, 6, 5, 3, 2, 1]
@@ -84,7 +84,13 @@ class Ui_Form_memo(object):
         self.comboBox_filter.addItem("")
         self.comboBox_filter.addItem("")
         self.comboBox_filter.addItem("")
+        self.comboBox_filter.addItem("")
+        self.comboBox_filter.addItem("")
         self.verticalLayout_3.addWidget(self.comboBox_filter)
+        self.lineEdit_search = QtWidgets.QLineEdit(self.groupBox_output)
+        self.lineEdit_search.setClearButtonEnabled(True)
+        self.lineEdit_search.setObjectName("lineEdit_search")
+        self.verticalLayout_3.addWidget(self.lineEdit_search)
         self.listView_list_output = QtWidgets.QListView(self.groupBox_output)
         self.listView_list_output.setAlternatingRowColors(True)
         self.listView_list_output.setObjectName("listView_list_output")
@@ -163,7 +169,12 @@ class Ui_Form_memo(object):
         self.groupBox_output.setTitle(_translate("Form_memo", "任务列表"))
         self.comboBox_filter.setItemText(0, _translate("Form_memo", "全部任务"))
         self.comboBox_filter.setItemText(1, _translate("Form_memo", "今日任务"))
-        self.comboBox_filter.setItemText(2, _translate("Form_memo", "周期任务"))
+        self.comboBox_filter.setItemText(2, _translate("Form_memo", "明日任务"))
+        self.comboBox_filter.setItemText(3, _translate("Form_memo", "周期任务"))
+        self.comboBox_filter.setItemText(4, _translate("Form_memo", "历史任务"))
+        self.lineEdit_search.setPlaceholderText(
+            _translate("Form_memo", "搜索任务内容，多个关键词用空格分隔")
+        )
         self.pushButton_import.setText(_translate("Form_memo", "导入"))
         self.pushButton_export.setText(_translate("Form_memo", "导出"))
         self.pushButton_clearall.setText(_translate("Form_memo", "清除"))
@@ -5,19 +5,20 @@ from PyQt5.QtWidgets import (
     QMessageBox,
     QListView,
     QFileDialog,
+    QProgressDialog,
 )
 from PyQt5.QtCore import Qt, QCoreApplication, QStringListModel
 from PyQt5.QtGui import QIcon
-import pandas as pd
-import json
 import logging
-from datetime import datetime
 from .main_ui import Ui_Form_memo
 from src.config import AppConfig
 from src.data_manager import DataManager
 from src.reminder import ReminderManager
 from src.audio_manager import AudioManager
 from src.ai_service import AIService
+from src.export_worker import ExportWorker
+from src.import_worker import ImportWorker
+from src.importer import ImportJob, parse_ai_tasks
 
 # 设置日志
 logger = logging.getLogger(__name__)
@@ -35,6 +36,8 @@ class MainWindow(QWidget):
         self.reminder = ReminderManager(self.data_manager)
         self.audio_manager = AudioManager()
         self.ai_service = AIService()
+        self._export_worker = None
+        self._import_worker = None
 
         # 启用输入法支持
         self.setAttribute(Qt.WA_InputMethodEnabled)
@@ -50,6 +53,9 @@ class MainWindow(QWidget):
         # 设置任务过滤器
         self.ui.comboBox_filter.currentIndexChanged.connect(self._filter_tasks)
 
+        # 设置任务搜索
+        self.ui.lineEdit_search.textChanged.connect(self._handle_search)
+
         # 初始化任务列表
         self._refresh_task_list()
 
@@ -85,11 +91,29 @@ class MainWindow(QWidget):
         show_action = menu.addAction("显示")
         show_action.triggered.connect(self.showNormal)
         quit_action = menu.addAction("退出")
-        quit_action.triggered.connect(QCoreApplication.instance().quit)
+        quit_action.triggered.connect(self._handle_quit)
 
         self.tray_icon.setContextMenu(menu)
         self.tray_icon.show()
 
+    def _handle_quit(self):
+        """退出程序前将未写入的数据落盘
+
+        先保存数据再停止语音线程，语音线程迟迟不退出时数据也已保存。
+        导入导出线程只等待WORKER_QUIT_TIMEOUT毫秒，不被卡住的AI请求拖住退出。
+        """
+        for worker in (self._export_worker, self._import_worker):
+            if worker is not None and worker.isRunning():
+                worker.cancel()
+                if not worker.wait(AppConfig.WORKER_QUIT_TIMEOUT):
+                    logger.warning(f"{type(worker).__name__} 未能及时结束")
+        try:
+            self.data_manager.close()
+        except Exception as e:
+            logger.error(f"退出时保存数据失败: {e}", exc_info=True)
+        self.reminder.stop()
+        QCoreApplication.instance().quit()
+
     def _handle_import_excel(self):
         """处理Excel导入"""
         try:
@@ -98,10 +122,7 @@ class MainWindow(QWidget):
             )
             if filename:
                 logger.debug(f"开始导入Excel文件: {filename}")
-                df = pd.read_excel(filename)
-                content = self._process_imported_data(df)
-                self.ui.plainTextEdit_text_input.setPlainText(content)
-                self._handle_extract()
+                self._start_import(filename)
         except Exception as e:
             logger.error(f"导入Excel失败: {e}", exc_info=True)
             QMessageBox.warning(self, "错误", f"导入失败: {str(e)}")
@@ -114,10 +135,7 @@ class MainWindow(QWidget):
             )
             if filename:
                 logger.debug(f"开始导入TXT文件: {filename}")
-                with open(filename, "r", encoding="utf-8") as f:
-                    content = f.read()
-                self.ui.plainTextEdit_text_input.setPlainText(content)
-                self._handle_extract()
+                self._start_import(filename)
         except Exception as e:
             logger.error(f"导入TXT失败: {e}", exc_info=True)
             QMessageBox.warning(self, "错误", f"导入失败: {str(e)}")
@@ -132,8 +150,11 @@ class MainWindow(QWidget):
                 if not filename.endswith(".xlsx"):
                     filename += ".xlsx"
                 logger.debug(f"开始导出Excel文件: {filename}")
-                self.data_manager.export_to_excel(filename)
-                QMessageBox.information(self, "成功", "任务列表已成功导出为Excel文件")
+                self._start_export(
+                    self.data_manager.export_to_excel,
+                    filename,
+                    "任务列表已成功导出为Excel文件",
+                )
         except Exception as e:
             logger.error(f"导出Excel失败: {e}", exc_info=True)
             QMessageBox.warning(self, "错误", f"导出失败: {str(e)}")
@@ -148,26 +169,119 @@ class MainWindow(QWidget):
                 if not filename.endswith(".txt"):
                     filename += ".txt"
                 logger.debug(f"开始导出TXT文件: {filename}")
-                self.data_manager.export_to_txt(filename)
-                QMessageBox.information(self, "成功", "任务列表已成功导出为TXT文件")
+                self._start_export(
+                    self.data_manager.export_to_txt,
+                    filename,
+                    "任务列表已成功导出为TXT文件",
+                )
         except Exception as e:
             logger.error(f"导出TXT失败: {e}", exc_info=True)
             QMessageBox.warning(self, "错误", f"导出失败: {str(e)}")
 
-    def _process_imported_data(self, df):
-        """处理导入的数据为文本格式"""
-        try:
-            text_lines = []
-            for _, row in df.iterrows():
-                line = []
-                for col in df.columns:
-                    if pd.notna(row[col]):  # 只添加非空值
-                        line.append(str(row[col]))
-                text_lines.append(" ".join(line))
-            return "\n".join(text_lines)
-        except Exception as e:
-            logger.error(f"处理导入数据失败: {e}", exc_info=True)
-            raise
+    def _start_export(self, export_func, filename: str, success_message: str):
+        """在后台线程中导出全部任务（包括归档的历史任务），显示进度对话框并支持取消"""
+        if self._export_worker is not None and self._export_worker.isRunning():
+            QMessageBox.information(self, "提示", "已有导出正在进行，请稍候")
+            return
+
+        progress_dialog = QProgressDialog("正在导出任务...", "取消", 0, 0, self)
+        progress_dialog.setWindowTitle("导出")
+        progress_dialog.setWindowModality(Qt.WindowModal)
+        progress_dialog.setMinimumDuration(500)
+
+        worker = ExportWorker(export_func, filename, include_archived=True)
+        progress_dialog.canceled.connect(worker.cancel)
+
+        def on_progress(done, total):
+            progress_dialog.setMaximum(total)
+            progress_dialog.setValue(done)
+
+        def on_finished():
+            progress_dialog.reset()
+
+        worker.progress.connect(on_progress)
+        worker.succeeded.connect(
+            lambda _: QMessageBox.information(self, "成功", success_message)
+        )
+        worker.cancelled.connect(lambda: logger.debug("导出已取消"))
+        worker.error.connect(
+            lambda message: QMessageBox.warning(self, "错误", f"导出失败: {message}")
+        )
+        worker.finished.connect(on_finished)
+        # 保留引用直到下一次导出，避免线程运行期间被回收
+        self._export_worker = worker
+        worker.start()
+
+    def _start_import(self, filename: str):
+        """分块并发导入文件，显示进度对话框并支持取消
+
+        导入中途失败或取消后，再次导入同一文件会跳过已导入的部分。
+        """
+        if self._import_worker is not None and self._import_worker.isRunning():
+            QMessageBox.information(self, "提示", "已有导入正在进行，请稍候")
+            return
+
+        job = ImportJob(filename)
+        if job.done:
+            logger.info(f"继续导入: 跳过已完成的 {len(job.done)} 块")
+        progress_dialog = QProgressDialog("正在导入任务...", "取消", 0, 0, self)
+        progress_dialog.setWindowTitle("导入")
+        progress_dialog.setWindowModality(Qt.WindowModal)
+        progress_dialog.setMinimumDuration(500)
+
+        worker = ImportWorker(self.ai_service, job)
+        progress_dialog.canceled.connect(worker.cancel)
+        imported = 0
+        write_failed = []  # 解析成功但写入失败的块，与解析失败的块一样留待下次导入
+
+        def on_chunk_parsed(index, tasks):
+            # 在主线程中写入，写入成功后才记录该块已完成
+            nonlocal imported
+            try:
+                self.data_manager.add_tasks(tasks)
+                job.mark_done(index)
+                imported += len(tasks)
+            except Exception as e:
+                logger.error(f"写入第 {index} 块失败: {e}", exc_info=True)
+                write_failed.append(index)
+
+        def on_progress(done, total):
+            progress_dialog.setMaximum(total)
+            progress_dialog.setValue(done)
+
+        def on_succeeded(failed):
+            # 各块的chunk_parsed都在succeeded之前送达，此时write_failed已完整
+            failed = sorted(set(failed) | set(write_failed))
+            if failed:
+                QMessageBox.warning(
+                    self,
+                    "部分导入失败",
+                    f"已导入 {imported} 个任务，{len(failed)} 块处理失败，"
+                    "重新导入同一文件可继续导入剩余部分",
+                )
+            else:
+                job.finish()
+                QMessageBox.information(self, "成功", f"成功导入 {imported} 个任务")
+
+        def on_finished():
+            progress_dialog.reset()
+            self._refresh_task_list()
+
+        worker.chunk_parsed.connect(on_chunk_parsed)
+        worker.progress.connect(on_progress)
+        worker.succeeded.connect(on_succeeded)
+        worker.cancelled.connect(
+            lambda: QMessageBox.information(
+                self, "已取消", f"已导入 {imported} 个任务，重新导入同一文件可继续"
+            )
+        )
+        worker.error.connect(
+            lambda message: QMessageBox.warning(self, "错误", f"导入失败: {message}")
+        )
+        worker.finished.connect(on_finished)
+        # 保留引用直到下一次导入，避免线程运行期间被回收
+        self._import_worker = worker
+        worker.start()
 
     def _handle_clear(self):
         self.data_manager.clear_all()
@@ -188,43 +302,55 @@ class MainWindow(QWidget):
         event.ignore()
 
     def _filter_tasks(self, index):
+        """切换筛选，搜索框中有内容时在当前搜索结果上筛选"""
+        self._refresh_task_list()
+
+    def _handle_search(self, text):
+        """按搜索框内容过滤任务列表，搜索框清空时恢复当前筛选"""
+        self._refresh_task_list()
+
+    def _visible_tasks(self):
+        """当前筛选和搜索框内容下应显示的任务
+
+        全部任务按搜索结果的顺序显示；其他筛选保持原有顺序，只保留与搜索匹配的任务。
+        历史任务在归档中搜索。
+        """
+        index = self.ui.comboBox_filter.currentIndex()
+        query = self.ui.lineEdit_search.text().strip()
+        if index == 4:  # 历史任务
+            return self.data_manager.get_archived_tasks(keyword=query or None)
         if index == 0:  # 全部任务
-            tasks = self.data_manager.get_all_tasks()
-        elif index == 1:  # 今日任务
+            if query:
+                return self.data_manager.search(query)
+            return self.data_manager.get_all_tasks()
+
+        if index == 1:  # 今日任务
             tasks = self.data_manager.get_today_tasks()
+        elif index == 2:  # 明日任务
+            tasks = self.data_manager.get_tomorrow_tasks()
         else:  # 周期任务
             tasks = self.data_manager.get_recurring_tasks()
-
-        self._update_task_list(tasks)
+        if query:
+            matches = self.data_manager.matches(query)
+            tasks = [task for task in tasks if task.id in matches]
+        return tasks
 
     def _update_task_list(self, tasks):
         """更新任务列表显示"""
         model = QStringListModel()
         formatted_tasks = []
 
-        for _, task in tasks.iterrows():
-            if task["type"] == "ONCE":
+        for task in tasks:
+            if not task.is_recurring:
                 # 一次性任务显示完整时间
                 formatted_tasks.append(
-                    f"{task['content']} - {task['datetime'].strftime('%Y年%m月%d日%H时%M分')}"
+                    f"{task.content} - {task.datetime.strftime('%Y年%m月%d日%H时%M分')}"
                 )
             else:
                 # 周期任务显示周期信息
-                cycle_info = (
-                    json.loads(task["cycle_info"]) if task["cycle_info"] else {}
+                formatted_tasks.append(
+                    f"{task.content} - {self._format_cycle_info(task.type, task.cycle or {})}"
                 )
-                if task["type"] == "DAILY":
-                    formatted_tasks.append(
-                        f"{task['content']} - 每天 {cycle_info.get('time', '00:00')}"
-                    )
-                elif task["type"] == "WEEKLY":
-                    formatted_tasks.append(
-                        f"{task['content']} - 每周{cycle_info.get('day', '')} {cycle_info.get('time', '00:00')}"
-                    )
-                elif task["type"] == "MONTHLY":
-                    formatted_tasks.append(
-                        f"{task['content']} - 每月{cycle_info.get('day', '')}日 {cycle_info.get('time', '00:00')}"
-                    )
 
         model.setStringList(formatted_tasks)
         self.ui.listView_list_output.setModel(model)
@@ -276,35 +402,14 @@ class MainWindow(QWidget):
         """处理AI返回的结果"""
         try:
             logger.debug(f"开始处理AI返回结果: {result}")
-            tasks = eval(result, {"__builtins__": {}}, {})
-            logger.debug(f"解析后的任务列表: {tasks}")
-
-            for task in tasks:
-                if not isinstance(task, dict):
-                    raise ValueError(f"任务格式错误: {task}")
-
-                # 从AI返回结果中提取信息
-                content = task["事项"]
-                time_tuple = task["时间"]
-                task_type = task["类型"]
-                cycle_info = task["周期"]
+            new_tasks = parse_ai_tasks(result)
 
-                # 将时间元组转换为datetime对象
-                task_time = datetime(*time_tuple)
-
-                # 添加到数据管理器
-                logger.debug(
-                    f"添加任务: {content} @ {task_time}, 类型: {task_type}, 周期: {cycle_info}"
-                )
-                self.data_manager.add_task(
-                    content=content,
-                    dt=task_time,
-                    task_type=task_type,
-                    cycle_info=cycle_info,
-                )
+            # 一次性写入数据管理器
+            logger.debug(f"添加任务: {new_tasks}")
+            self.data_manager.add_tasks(new_tasks)
 
             self._refresh_task_list()
-            QMessageBox.information(self, "成功", f"成功添加 {len(tasks)} 个任务")
+            QMessageBox.information(self, "成功", f"成功添加 {len(new_tasks)} 个任务")
 
         except Exception as e:
             logger.error(f"处理AI结果失败: {e}", exc_info=True)
@@ -334,9 +439,8 @@ class MainWindow(QWidget):
             QMessageBox.warning(self, "转换失败", "未能识别语音内容")
 
     def _refresh_task_list(self):
-        """刷新任务列表显示"""
-        tasks = self.data_manager.get_all_tasks()
-        self._update_task_list(tasks)
+        """按当前筛选和搜索框内容刷新任务列表显示"""
+        self._update_task_list(self._visible_tasks())
 
     def _handle_audio_error(self, error_msg):
         """处理语音转换错误"""